@@ -2,18 +2,17 @@ from flask import Flask
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from .models.member import db
+from .utils.db_engine import database_uri, jobs_database_uri, engine_options, configure_engine
+from .utils.logging_config import configure_logging
 import os
 import logging
 
 def create_app(test_config=None):
     app = Flask(__name__)
     
-    # 配置日志
-    logging.basicConfig(level=logging.INFO)
-    
     # 基础配置
     app.config.from_mapping(
-        SQLALCHEMY_DATABASE_URI='sqlite:///jlife.db',
+        SQLALCHEMY_DATABASE_URI=database_uri(),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev')
     )
@@ -22,16 +21,34 @@ def create_app(test_config=None):
     if test_config:
         app.config.update(test_config)
     
+    # 配置日志：结构化格式、分模块级别，经队列由后台线程写出（LOG_LEVEL / LOG_LEVELS / LOG_FORMAT）
+    configure_logging(app)
+    
+    # 导入任务状态存放在 jobs 绑定库中，各工作进程共用
+    app.config['SQLALCHEMY_BINDS'] = {
+        'jobs': jobs_database_uri(app.config['SQLALCHEMY_DATABASE_URI']),
+        **(app.config.get('SQLALCHEMY_BINDS') or {})
+    }
+    
+    # 数据库引擎配置：SQLite 文件库在生产配置档下使用共享连接池，PostgreSQL 连接前检测
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    
     # 初始化扩展
     CORS(app)
     db.init_app(app)
     
     # 注册蓝图
     try:
-        from .routes import member_bp, inventory_bp, attendance_bp
+        from .routes import member_bp, inventory_bp, attendance_bp, jobs_bp, cache_bp, metrics_bp
         app.register_blueprint(member_bp, url_prefix='/api/members')
         app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
         app.register_blueprint(attendance_bp, url_prefix='/api/attendance')
+        app.register_blueprint(jobs_bp, url_prefix='/api/import-jobs')
+        app.register_blueprint(cache_bp, url_prefix='/api/cache')
+        app.register_blueprint(metrics_bp, url_prefix='/metrics')
     except ImportError as e:
         logging.error(f"蓝图注册失败: {str(e)}")
         raise
@@ -39,7 +56,27 @@ def create_app(test_config=None):
     # 创建数据库表
     try:
         with app.app_context():
+            # 连接时设置 PRAGMA（WAL、busy_timeout 等），需在首次连接前注册
+            configure_engine(app, db)
+            # 请求耗时和 SQL 计时（SLOW_REQUEST_SECONDS / SLOW_QUERY_SECONDS 控制慢日志）
+            from .utils.metrics import init_metrics
+            init_metrics(app, db)
             db.create_all()
+            # 为已存在的表补上新增的列和索引
+            from .utils.schema import ensure_columns, ensure_indexes
+            ensure_columns(app)
+            ensure_indexes(app)
+            # 会员全文搜索索引（SQLite FTS5 trigram）
+            from .utils.search_index import ensure_search_index, ensure_bigram_index
+            app.extensions['member_search_fts'] = ensure_search_index(app)
+            # 两个中文字的关键词用二字组索引
+            app.extensions['member_search_bigram'] = ensure_bigram_index(app)
+            # 会员统计计数
+            from .utils.member_stats import ensure_member_stats
+            ensure_member_stats()
+            # 库存月度汇总
+            from .utils.inventory_rollup import ensure_inventory_rollup
+            ensure_inventory_rollup()
     except Exception as e:
         logging.error(f"数据库初始化失败: {str(e)}")
         raise
@@ -37,10 +37,14 @@ class Event(db.Model):
 
 class Attendance(db.Model):
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # 同一会员在同一活动只有一条考勤记录；签到时的查找和去重都走此索引
+        db.Index('ix_attendance_member_event', '會員編號', '活動編號', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     會員編號 = db.Column(db.String(20), db.ForeignKey('members.會員編號'), nullable=False)
-    活動編號 = db.Column(db.String(50), db.ForeignKey('events.活動編號'), nullable=False)
+    活動編號 = db.Column(db.String(50), db.ForeignKey('events.活動編號'), nullable=False, index=True)
     是否出席 = db.Column(db.Boolean, default=False)
     簽到時間 = db.Column(db.DateTime)
     簽退時間 = db.Column(db.DateTime)
@@ -5,7 +5,7 @@ class Inventory(db.Model):
     __tablename__ = 'inventory'
     
     id = db.Column(db.Integer, primary_key=True)
-    月份 = db.Column(db.Date, nullable=False)
+    月份 = db.Column(db.Date, nullable=False, index=True)
     產品編號 = db.Column(db.String(50), nullable=False)
     產品描述 = db.Column(db.String(200))
     數量 = db.Column(db.Integer)
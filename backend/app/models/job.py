@@ -0,0 +1,27 @@
+from .member import db
+
+class ImportJobRecord(db.Model):
+    """后台导入任务的状态，各工作进程共用；任务状态变化和导入进度写入此表
+
+    存放在 jobs 数据库（见 db_engine.jobs_database_uri），导入事务持有主库写锁时仍可更新。
+    """
+    __tablename__ = 'import_jobs'
+    __bind_key__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255))
+    stream = db.Column(db.Boolean, nullable=False, default=False)
+    upsert = db.Column(db.Boolean, nullable=False, default=False)
+    batch_size = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, index=True)
+    rows_parsed = db.Column(db.Integer, nullable=False, default=0)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text)
+    error = db.Column(db.Text)
+    errors = db.Column(db.JSON)
+    # 执行任务的进程（主机名:pid），用来识别随进程退出而中断的任务
+    owner = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
@@ -1,8 +1,36 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 
 db = SQLAlchemy()
 
+class birth_year(FunctionElement):
+    """日期的年份（整数）；用作生成列的表达式，各数据库写法不同"""
+    type = Integer()
+    name = 'birth_year'
+    inherit_cache = True
+
+@compiles(birth_year)
+def _birth_year(element, compiler, **kw):
+    return f'CAST(EXTRACT(YEAR FROM {compiler.process(element.clauses, **kw)}) AS INTEGER)'
+
+@compiles(birth_year, 'sqlite')
+def _birth_year_sqlite(element, compiler, **kw):
+    # SQLite 的日期以 YYYY-MM-DD 文本保存
+    return f'CAST(substr({compiler.process(element.clauses, **kw)}, 1, 4) AS INTEGER)'
+
+def calculate_age(birth_date, today=None):
+    """按出生日期计算周岁"""
+    if not birth_date:
+        return None
+    today = today or datetime.now().date()
+    age = today.year - birth_date.year
+    if today.month < birth_date.month or (today.month == birth_date.month and today.day < birth_date.day):
+        age -= 1
+    return age
+
 class Member(db.Model):
     __tablename__ = 'members'
     
@@ -10,6 +38,8 @@ class Member(db.Model):
     中文姓名 = db.Column(db.String(50), nullable=False)
     英文姓名 = db.Column(db.String(100))
     出生日期 = db.Column(db.Date)
+    # 由数据库在写入时按出生日期生成，与出生日期组成索引，年龄统计按年份范围计数
+    出生年份 = db.Column(db.Integer, db.Computed(birth_year(出生日期)))
     性別 = db.Column(db.String(10))
     身份證號 = db.Column(db.String(20), unique=True)
     電話 = db.Column(db.String(20))
@@ -30,15 +60,13 @@ class Member(db.Model):
     創建時間 = db.Column(db.DateTime, default=datetime.utcnow)
     更新時間 = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_members_birth_year', '出生年份', '出生日期'),
+    )
+
     @property
     def 年齡(self):
-        if not self.出生日期:
-            return None
-        today = datetime.now().date()
-        age = today.year - self.出生日期.year
-        if today.month < self.出生日期.month or (today.month == self.出生日期.month and today.day < self.出生日期.day):
-            age -= 1
-        return age
+        return calculate_age(self.出生日期)
 
     def to_dict(self):
         return {
@@ -66,4 +94,12 @@ class Member(db.Model):
             '備註': self.備註,
             '創建時間': self.創建時間.isoformat(),
             '更新時間': self.更新時間.isoformat()
-        } 
\ No newline at end of file
+        } 
+
+class MemberFingerprint(db.Model):
+    """会员导入指纹：记录最近一次导入时该行内容的哈希，用于增量导入"""
+    __tablename__ = 'member_fingerprints'
+
+    會員編號 = db.Column(db.String(20), primary_key=True)
+    指紋 = db.Column(db.BigInteger, nullable=False)
+    更新時間 = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,21 @@
+from .member import db
+
+class MemberStat(db.Model):
+    """会员统计计数：按维度（地區/經濟狀況）和取值预先汇总的人数"""
+    __tablename__ = 'member_stats'
+
+    維度 = db.Column(db.String(20), primary_key=True)
+    值 = db.Column(db.String(100), primary_key=True)
+    人數 = db.Column(db.Integer, nullable=False, default=0)
+
+class InventoryMonthly(db.Model):
+    """库存月度汇总：按 月份 × 產品描述 × 物資來源 累计重量、数量和金额"""
+    __tablename__ = 'inventory_monthly'
+
+    月份 = db.Column(db.Date, primary_key=True)
+    產品描述 = db.Column(db.String(200), primary_key=True)
+    物資來源 = db.Column(db.String(100), primary_key=True)
+    總重量_kg = db.Column(db.Float, nullable=False, default=0)
+    數量 = db.Column(db.Integer, nullable=False, default=0)
+    總金額 = db.Column(db.Float, nullable=False, default=0)
+    記錄數 = db.Column(db.Integer, nullable=False, default=0)
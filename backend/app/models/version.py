@@ -0,0 +1,8 @@
+from .member import db
+
+class TableVersion(db.Model):
+    """各数据表的变更版本号，每次写入后递增，用作缓存键和 ETag"""
+    __tablename__ = 'table_versions'
+
+    表名 = db.Column(db.String(50), primary_key=True)
+    版本 = db.Column(db.Integer, nullable=False, default=0)
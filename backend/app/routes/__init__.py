@@ -1,5 +1,8 @@
 from .member import member_bp
 from .inventory import inventory_bp
 from .attendance import attendance_bp
+from .jobs import jobs_bp
+from .cache import cache_bp
+from .metrics import metrics_bp
 
-__all__ = ['member_bp', 'inventory_bp', 'attendance_bp'] 
\ No newline at end of file
+__all__ = ['member_bp', 'inventory_bp', 'attendance_bp', 'jobs_bp', 'cache_bp', 'metrics_bp'] 
\ No newline at end of file
@@ -2,28 +2,37 @@ from flask import Blueprint, request, jsonify
 from ..models.attendance import Event, Attendance
 from ..models.member import db
 from ..utils.excel_importer import ExcelImporter
+from ..utils.import_jobs import get_job_manager
+from ..utils.cache import bump_on_write, cached_by_version, invalidate_entities
+from ..utils.pagination import wants_keyset, keyset_response
+from ..utils.serializers import EVENT_SERIALIZER, ATTENDANCE_SERIALIZER, json_response, paginated_response
+from ..utils.attendance_stats import event_attendance_stats
+from ..utils.check_in import bulk_check_in
 from datetime import datetime
-from sqlalchemy import func
 
 attendance_bp = Blueprint('attendance', __name__)
 
+# 写请求成功后递增数据表版本号，供缓存和 ETag 使用
+bump_on_write(attendance_bp, 'events', 'attendance')
+
+# 批量签到每次最多的人数
+MAX_BATCH_CHECK_IN = 5000
+
 # 活动相关路由
 @attendance_bp.route('/events', methods=['GET'])
+@cached_by_version('events')
 def get_events():
+    # ?after= / ?cursor=1 使用游标分页，深页与首页成本相同
+    if wants_keyset():
+        return keyset_response(Event.query, {'id': Event.id, '活動編號': Event.活動編號},
+                               'events', EVENT_SERIALIZER)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    events = Event.query.paginate(page=page, per_page=per_page)
-    return jsonify({
-        'total': events.total,
-        'pages': events.pages,
-        'current_page': events.page,
-        'events': [event.to_dict() for event in events.items]
-    })
+    return paginated_response(Event.query, EVENT_SERIALIZER, page, per_page, 'events')
 
 @attendance_bp.route('/events/<string:event_id>', methods=['GET'])
 def get_event(event_id):
-    event = Event.query.filter_by(活動編號=event_id).first_or_404()
-    return jsonify(event.to_dict())
+    return json_response(EVENT_SERIALIZER.cached_first_or_404(event_id, Event.query.filter_by(活動編號=event_id)))
 
 @attendance_bp.route('/events', methods=['POST'])
 def create_event():
@@ -31,6 +40,7 @@ def create_event():
     event = Event(**data)
     db.session.add(event)
     db.session.commit()
+    invalidate_entities('events', event.活動編號)
     return jsonify(event.to_dict()), 201
 
 @attendance_bp.route('/events/<string:event_id>', methods=['PUT'])
@@ -40,6 +50,8 @@ def update_event(event_id):
     for key, value in data.items():
         setattr(event, key, value)
     db.session.commit()
+    # 活動編號可能被修改，新旧编号都失效
+    invalidate_entities('events', event_id, event.活動編號)
     return jsonify(event.to_dict())
 
 @attendance_bp.route('/events/<string:event_id>', methods=['DELETE'])
@@ -47,10 +59,12 @@ def delete_event(event_id):
     event = Event.query.filter_by(活動編號=event_id).first_or_404()
     db.session.delete(event)
     db.session.commit()
+    invalidate_entities('events', event_id)
     return '', 204
 
 # 考勤相关路由
 @attendance_bp.route('/', methods=['GET'])
+@cached_by_version('attendance')
 def get_attendance():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
@@ -60,13 +74,11 @@ def get_attendance():
     if event_id:
         query = query.filter_by(活動編號=event_id)
     
-    attendance = query.paginate(page=page, per_page=per_page)
-    return jsonify({
-        'total': attendance.total,
-        'pages': attendance.pages,
-        'current_page': attendance.page,
-        'records': [record.to_dict() for record in attendance.items]
-    })
+    if wants_keyset():
+        return keyset_response(query, {'id': Attendance.id},
+                               'records', ATTENDANCE_SERIALIZER)
+    
+    return paginated_response(query, ATTENDANCE_SERIALIZER, page, per_page, 'records')
 
 @attendance_bp.route('/mark', methods=['POST'])
 def mark_attendance():
@@ -97,6 +109,30 @@ def mark_attendance():
     db.session.commit()
     return jsonify(attendance.to_dict())
 
+@attendance_bp.route('/mark/batch', methods=['POST'])
+def mark_attendance_batch():
+    """批量签到：{"活動編號": "E1", "會員編號": ["M1", "M2", ...]}，一个事务完成"""
+    data = request.get_json() or {}
+    event_id = data.get('活動編號')
+    member_ids = data.get('會員編號')
+    
+    if not event_id or not isinstance(member_ids, list) or not member_ids:
+        return jsonify({'error': '缺少必要参数'}), 400
+    # 去重并保持原有顺序
+    member_ids = list(dict.fromkeys(str(member_id) for member_id in member_ids if member_id))
+    if len(member_ids) > MAX_BATCH_CHECK_IN:
+        return jsonify({'error': f'每次最多签到 {MAX_BATCH_CHECK_IN} 人'}), 400
+    if not Event.query.filter_by(活動編號=event_id).first():
+        return jsonify({'error': '找不到活动'}), 404
+    
+    created, updated = bulk_check_in(event_id, member_ids)
+    return jsonify({
+        '活動編號': event_id,
+        'checked_in': len(member_ids),
+        'created': created,
+        'updated': updated
+    })
+
 @attendance_bp.route('/import', methods=['POST'])
 def import_attendance():
     if 'file' not in request.files:
@@ -107,33 +143,59 @@ def import_attendance():
     if not file.filename.endswith('.xlsx'):
         return jsonify({'error': '请上传Excel文件'}), 400
     
-    success, message = ExcelImporter.import_attendance(file)
+    # ?stream=1 使用只读逐行读取，内存占用与文件大小无关
+    stream = request.args.get('stream', 0, type=int) == 1
+    # ?async=1 交给后台任务队列，立即返回任务编号
+    if request.args.get('async', 0, type=int) == 1:
+        job = get_job_manager().submit(file, 'attendance', stream=stream)
+        return jsonify(job.to_dict()), 202
+    success, message = ExcelImporter.import_attendance(file, stream=stream)
     if success:
         return jsonify({'message': message}), 200
     return jsonify({'error': message}), 400
 
 @attendance_bp.route('/stats', methods=['GET'])
+@cached_by_version('events', 'attendance')
 def get_attendance_stats():
     event_id = request.args.get('event_id')
     
     if not event_id:
         return jsonify({'error': '缺少活动编号'}), 400
     
-    # 获取活动信息
-    event = Event.query.filter_by(活動編號=event_id).first_or_404()
+    # 活动信息和出席情况在同一查询中取得
+    stats = event_attendance_stats(Event.活動編號 == event_id)
+    if not stats:
+        return jsonify({'error': '找不到活动'}), 404
+    return jsonify(stats[0])
+
+@attendance_bp.route('/stats/batch', methods=['GET'])
+@cached_by_version('events', 'attendance')
+def get_batch_attendance_stats():
+    """多个活动的出席统计：?event_ids=E1,E2 或 ?start=YYYY-MM-DD&end=YYYY-MM-DD"""
+    event_ids = [value for value in request.args.get('event_ids', '').split(',') if value]
+    start = request.args.get('start')
+    end = request.args.get('end')
     
-    # 统计出席情况
-    attendance_stats = db.session.query(
-        func.count(Attendance.id).label('total'),
-        func.sum(case([(Attendance.是否出席 == True, 1)], else_=0)).label('present')
-    ).filter_by(活動編號=event_id).first()
+    if not event_ids and not (start and end):
+        return jsonify({'error': '缺少活动编号或日期范围'}), 400
     
-    total = attendance_stats.total or 0
-    present = attendance_stats.present or 0
+    criteria = []
+    if event_ids:
+        criteria.append(Event.活動編號.in_(event_ids))
+    if start and end:
+        try:
+            start_date = datetime.strptime(start, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': '日期格式应为 YYYY-MM-DD'}), 400
+        criteria.append(Event.活動日期.between(start_date, end_date))
     
+    stats = event_attendance_stats(*criteria)
+    total = sum(item['total_registered'] for item in stats)
+    present = sum(item['total_present'] for item in stats)
     return jsonify({
-        'event': event.to_dict(),
+        'events': stats,
         'total_registered': total,
         'total_present': present,
         'attendance_rate': (present / total * 100) if total > 0 else 0
-    }) 
\ No newline at end of file
+    })
@@ -0,0 +1,9 @@
+from flask import Blueprint, jsonify
+from ..utils.cache import get_entity_cache
+
+cache_bp = Blueprint('cache', __name__)
+
+@cache_bp.route('/stats', methods=['GET'])
+def get_cache_stats():
+    # 单条记录缓存的命中/未命中计数，用于调整 ENTITY_CACHE_ENTRIES / ENTITY_CACHE_TTL
+    return jsonify({'entities': get_entity_cache().stats()})
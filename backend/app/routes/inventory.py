@@ -2,27 +2,32 @@ from flask import Blueprint, request, jsonify
 from ..models.inventory import Inventory
 from ..models.member import db
 from ..utils.excel_importer import ExcelImporter
+from ..utils.import_jobs import get_job_manager
+from ..utils.cache import bump_on_write, cached_by_version, invalidate_entities
+from ..utils.pagination import wants_keyset, keyset_response
+from ..utils.serializers import INVENTORY_SERIALIZER, json_response, paginated_response
+from ..utils.inventory_rollup import read_yearly_stats
 from datetime import datetime
-from sqlalchemy import func
 
 inventory_bp = Blueprint('inventory', __name__)
 
+# 写请求成功后递增数据表版本号，供缓存和 ETag 使用
+bump_on_write(inventory_bp, 'inventory')
+
 @inventory_bp.route('/', methods=['GET'])
+@cached_by_version('inventory')
 def get_inventory():
+    # ?after= / ?cursor=1 使用游标分页，深页与首页成本相同
+    if wants_keyset():
+        return keyset_response(Inventory.query, {'id': Inventory.id},
+                               'items', INVENTORY_SERIALIZER)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    inventory = Inventory.query.paginate(page=page, per_page=per_page)
-    return jsonify({
-        'total': inventory.total,
-        'pages': inventory.pages,
-        'current_page': inventory.page,
-        'items': [item.to_dict() for item in inventory.items]
-    })
+    return paginated_response(Inventory.query, INVENTORY_SERIALIZER, page, per_page, 'items')
 
 @inventory_bp.route('/<int:item_id>', methods=['GET'])
 def get_item(item_id):
-    item = Inventory.query.get_or_404(item_id)
-    return jsonify(item.to_dict())
+    return json_response(INVENTORY_SERIALIZER.cached_first_or_404(item_id, Inventory.query.filter_by(id=item_id)))
 
 @inventory_bp.route('/', methods=['POST'])
 def create_item():
@@ -30,6 +35,7 @@ def create_item():
     item = Inventory(**data)
     db.session.add(item)
     db.session.commit()
+    invalidate_entities('inventory', item.id)
     return jsonify(item.to_dict()), 201
 
 @inventory_bp.route('/<int:item_id>', methods=['PUT'])
@@ -39,6 +45,7 @@ def update_item(item_id):
     for key, value in data.items():
         setattr(item, key, value)
     db.session.commit()
+    invalidate_entities('inventory', item_id)
     return jsonify(item.to_dict())
 
 @inventory_bp.route('/<int:item_id>', methods=['DELETE'])
@@ -46,6 +53,7 @@ def delete_item(item_id):
     item = Inventory.query.get_or_404(item_id)
     db.session.delete(item)
     db.session.commit()
+    invalidate_entities('inventory', item_id)
     return '', 204
 
 @inventory_bp.route('/import', methods=['POST'])
@@ -58,7 +66,13 @@ def import_inventory():
     if not file.filename.endswith('.xlsx'):
         return jsonify({'error': '請上傳Excel文件'}), 400
     
-    success, message = ExcelImporter.import_inventory(file)
+    # ?stream=1 使用只读逐行读取，内存占用与文件大小无关
+    stream = request.args.get('stream', 0, type=int) == 1
+    # ?async=1 交给后台任务队列，立即返回任务编号
+    if request.args.get('async', 0, type=int) == 1:
+        job = get_job_manager().submit(file, 'inventory', stream=stream)
+        return jsonify(job.to_dict()), 202
+    success, message = ExcelImporter.import_inventory(file, stream=stream)
     if success:
         return jsonify({'message': message}), 200
     return jsonify({'error': message}), 400
@@ -66,42 +80,5 @@ def import_inventory():
 @inventory_bp.route('/stats/yearly', methods=['GET'])
 def get_yearly_stats():
     year = request.args.get('year', datetime.now().year, type=int)
-    
-    # 按月份统计总重量
-    monthly_weight = db.session.query(
-        func.sum(Inventory.總重量_kg).label('total_weight'),
-        func.strftime('%m', Inventory.月份).label('month')
-    ).filter(
-        func.strftime('%Y', Inventory.月份) == str(year)
-    ).group_by('month').all()
-    
-    # 按产品统计总重量和数量
-    product_stats = db.session.query(
-        Inventory.產品描述,
-        func.sum(Inventory.總重量_kg).label('total_weight'),
-        func.sum(Inventory.數量).label('total_count')
-    ).filter(
-        func.strftime('%Y', Inventory.月份) == str(year)
-    ).group_by(Inventory.產品描述).all()
-    
-    # 按物资来源统计总金额
-    source_stats = db.session.query(
-        Inventory.物資來源,
-        func.sum(Inventory.總金額).label('total_amount')
-    ).filter(
-        func.strftime('%Y', Inventory.月份) == str(year)
-    ).group_by(Inventory.物資來源).all()
-    
-    return jsonify({
-        'year': year,
-        'monthly_weight': [{'month': month, 'total_weight': weight} for weight, month in monthly_weight],
-        'product_stats': [{
-            'product': product,
-            'total_weight': weight,
-            'total_count': count
-        } for product, weight, count in product_stats],
-        'source_stats': [{
-            'source': source,
-            'total_amount': amount
-        } for source, amount in source_stats]
-    }) 
\ No newline at end of file
+    # 从月度汇总表按日期范围读取，一次查询得出全部统计
+    return jsonify(read_yearly_stats(year))
@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+from ..utils.import_jobs import get_job_manager
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/', methods=['GET'])
+def list_jobs():
+    jobs = get_job_manager().list()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+@jobs_bp.route('/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': '找不到導入任務'}), 404
+    return jsonify(job.to_dict())
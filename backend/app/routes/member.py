@@ -1,13 +1,25 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from ..models.member import Member, db
 from ..utils.excel_importer import ExcelImporter
+from ..utils.member_upsert import forget_fingerprint
+from ..utils.import_jobs import get_job_manager
+from ..utils.cache import bump_on_write, cached_by_version, invalidate_entities
+from ..utils.pagination import wants_keyset, keyset_response
+from ..utils.serializers import MEMBER_SERIALIZER, json_response, paginated_response
+from ..utils.excel_writer import get_excel_writer
+from ..utils.export_stream import iter_members_csv, iter_members_xlsx
+from ..utils.search_index import search_members as member_search
+from ..utils.member_stats import read_member_stats
+from ..utils.logging_config import get_logger
 from datetime import datetime
-import pandas as pd
-import os
-from sqlalchemy import or_
+
+logger = get_logger(__name__)
 
 member_bp = Blueprint('member', __name__)
 
+# 写请求成功后递增数据表版本号，供缓存和 ETag 使用
+bump_on_write(member_bp, 'members')
+
 def handle_error(func):
     def wrapper(*args, **kwargs):
         try:
@@ -18,96 +30,20 @@ def handle_error(func):
     wrapper.__name__ = func.__name__
     return wrapper
 
-def get_excel_path():
-    """获取Excel文件路径"""
-    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    excel_path = os.path.join(root_dir, 'update.xlsx')
-    print(f"Excel文件路径: {excel_path}")
-    # 确保目录存在
-    os.makedirs(os.path.dirname(excel_path), exist_ok=True)
-    return excel_path
-
-def get_all_members_data():
-    """获取所有会员数据并转换为适合Excel的格式"""
-    try:
-        print("開始獲取會員數據...")
-        members = Member.query.all()
-        print(f"從數據庫獲取到 {len(members)} 條會員記錄")
-        
-        data = []
-        for member in members:
-            try:
-                member_dict = member.to_dict()
-                # 转换日期为字符串格式
-                if member_dict.get('出生日期'):
-                    member_dict['出生日期'] = datetime.strptime(member_dict['出生日期'], '%Y-%m-%d').strftime('%Y-%m-%d')
-                if member_dict.get('入會日期'):
-                    member_dict['入會日期'] = datetime.strptime(member_dict['入會日期'], '%Y-%m-%d').strftime('%Y-%m-%d')
-                data.append(member_dict)
-            except Exception as e:
-                print(f"處理會員數據時出錯 (ID: {member.id}): {str(e)}")
-                continue
-        
-        print(f"成功處理 {len(data)} 條會員數據")
-        return data
-    except Exception as e:
-        print(f"獲取會員數據失敗: {str(e)}")
-        return []
-
-def update_excel_file(member_data):
-    """更新Excel文件，添加新会员数据"""
-    try:
-        excel_path = get_excel_path()
-        print(f"正在更新Excel文件: {excel_path}")
-        
-        # 获取所有会员数据
-        all_data = get_all_members_data()
-        print(f"获取到 {len(all_data)} 条会员数据")
-        
-        # 创建DataFrame并设置列顺序
-        columns = [
-            '會員編號', '中文姓名', '英文姓名', '性別', '出生日期', '年齡',
-            '身份證號', '電話', '電郵', '地址', '地區', '經濟狀況',
-            '職業', '教育程度', '婚姻狀況', '家庭人數', '緊急聯絡人',
-            '緊急聯絡電話', '入會日期', '會員狀態', '備註'
-        ]
-        df = pd.DataFrame(all_data)
-        df = df[columns]  # 重新排序列
-        
-        # 如果文件存在，读取现有数据
-        if os.path.exists(excel_path):
-            existing_df = pd.read_excel(excel_path)
-            print(f"讀取到現有Excel文件，包含 {len(existing_df)} 行數據")
-            
-            # 合并数据，避免重复
-            df = pd.concat([existing_df, df], ignore_index=True)
-            df = df.drop_duplicates(subset=['會員編號'], keep='last')
-            print(f"合併後共有 {len(df)} 行數據")
-        
-        # 保存到Excel文件
-        df.to_excel(excel_path, index=False, engine='openpyxl')
-        print(f"Excel文件已成功更新到: {excel_path}")
-        return True, f"Excel文件已更新到: {excel_path}"
-    except Exception as e:
-        print(f"更新Excel文件失败: {str(e)}")
-        return False, f"更新Excel文件失败: {str(e)}"
-
 @member_bp.route('/', methods=['GET'])
+@cached_by_version('members', daily=True)
 def get_members():
+    # ?after= / ?cursor=1 使用游标分页，深页与首页成本相同
+    if wants_keyset():
+        return keyset_response(Member.query, {'id': Member.id, '會員編號': Member.會員編號},
+                               'members', MEMBER_SERIALIZER)
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    members = Member.query.paginate(page=page, per_page=per_page)
-    return jsonify({
-        'total': members.total,
-        'pages': members.pages,
-        'current_page': members.page,
-        'members': [member.to_dict() for member in members.items]
-    })
+    return paginated_response(Member.query, MEMBER_SERIALIZER, page, per_page, 'members')
 
 @member_bp.route('/<string:member_id>', methods=['GET'])
 def get_member(member_id):
-    member = Member.query.filter_by(會員編號=member_id).first_or_404()
-    return jsonify(member.to_dict())
+    return json_response(MEMBER_SERIALIZER.cached_first_or_404(member_id, Member.query.filter_by(會員編號=member_id)))
 
 @member_bp.route('/', methods=['POST'])
 @handle_error
@@ -138,11 +74,10 @@ def create_member():
     member = Member(**data)
     db.session.add(member)
     db.session.commit()
+    invalidate_entities('members', member.會員編號)
     
-    # 更新Excel文件
-    success, message = update_excel_file(member.to_dict())
-    if not success:
-        print(f"Warning: {message}")
+    # 通知后台线程更新Excel文件（多次变更合并为一次写入）
+    get_excel_writer().mark_dirty()
     
     return jsonify(member.to_dict()), 201
 
@@ -161,7 +96,11 @@ def update_member(member_id):
     for key, value in data.items():
         setattr(member, key, value)
     
+    forget_fingerprint(member_id)
     db.session.commit()
+    # 會員編號可能被修改，新旧编号都失效
+    invalidate_entities('members', member_id, member.會員編號)
+    get_excel_writer().mark_dirty()
     return jsonify(member.to_dict())
 
 @member_bp.route('/<string:member_id>', methods=['DELETE'])
@@ -169,7 +108,10 @@ def update_member(member_id):
 def delete_member(member_id):
     member = Member.query.filter_by(會員編號=member_id).first_or_404()
     db.session.delete(member)
+    forget_fingerprint(member_id)
     db.session.commit()
+    invalidate_entities('members', member_id)
+    get_excel_writer().mark_dirty()
     return '', 204
 
 @member_bp.route('/import', methods=['POST'])
@@ -183,227 +125,85 @@ def import_members():
     if not file.filename.endswith('.xlsx'):
         return jsonify({'error': '請上傳Excel文件'}), 400
     
-    success, message = ExcelImporter.import_members(file)
+    # ?stream=1 使用只读逐行读取，内存占用与文件大小无关
+    stream = request.args.get('stream', 0, type=int) == 1
+    # ?mode=upsert 按會員編號增量导入，已存在且未变更的会员直接跳过
+    upsert = request.args.get('mode') == 'upsert'
+    # ?async=1 交给后台任务队列，立即返回任务编号
+    if request.args.get('async', 0, type=int) == 1:
+        job = get_job_manager().submit(file, 'members', stream=stream, upsert=upsert)
+        return jsonify(job.to_dict()), 202
+    if upsert:
+        success, message = ExcelImporter.upsert_members(file, stream=stream)
+    else:
+        success, message = ExcelImporter.import_members(file, stream=stream)
     if success:
         return jsonify({'message': message}), 200
     return jsonify({'error': message}), 400
 
 @member_bp.route('/stats', methods=['GET'])
+@cached_by_version('members', daily=True)
 @handle_error
 def get_stats():
-    total_members = Member.query.count()
-    age_stats = db.session.query(
-        db.func.count(Member.id).label('count'),
-        Member.年齡
-    ).group_by(Member.年齡).all()
-    
-    area_stats = db.session.query(
-        db.func.count(Member.id).label('count'),
-        Member.地區
-    ).group_by(Member.地區).all()
-    
-    economic_stats = db.session.query(
-        db.func.count(Member.id).label('count'),
-        Member.經濟狀況
-    ).group_by(Member.經濟狀況).all()
-    
-    return jsonify({
-        'total_members': total_members,
-        'age_distribution': [{'age': age, 'count': count} for count, age in age_stats],
-        'area_distribution': [{'area': area, 'count': count} for count, area in area_stats],
-        'economic_distribution': [{'status': status, 'count': count} for count, status in economic_stats]
-    })
+    # 地區、經濟狀況读取增量维护的计数，年龄按出生年份索引计数；结果按数据版本和日期缓存
+    return jsonify(read_member_stats())
+
+def export_headers():
+    """导出文件名含当前时间，缓存命中时也重新生成"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    extension = 'csv' if request.args.get('format') == 'csv' else 'xlsx'
+    return {'Content-Disposition': f'attachment; filename=members_export_{timestamp}.{extension}'}
 
 @member_bp.route('/export', methods=['GET'])
+@cached_by_version('members', daily=True, fresh_headers=export_headers)
 @handle_error
 def export_members():
-    # 获取所有会员数据
-    members = Member.query.all()
-    
-    # 创建DataFrame
-    data = []
-    for member in members:
-        member_dict = member.to_dict()
-        # 将日期转换为字符串格式
-        if member_dict['出生日期']:
-            member_dict['出生日期'] = datetime.strptime(member_dict['出生日期'], '%Y-%m-%d').strftime('%Y-%m-%d')
-        if member_dict['入會日期']:
-            member_dict['入會日期'] = datetime.strptime(member_dict['入會日期'], '%Y-%m-%d').strftime('%Y-%m-%d')
-        data.append(member_dict)
-    
-    df = pd.DataFrame(data)
-    
-    # 确保导出目录存在
-    export_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'exports')
-    os.makedirs(export_dir, exist_ok=True)
-    
-    # 生成文件名（使用当前时间戳）
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'members_export_{timestamp}.xlsx'
-    filepath = os.path.join(export_dir, filename)
-    
-    # 导出到Excel
-    df.to_excel(filepath, index=False, engine='openpyxl')
-    
-    # 发送文件
-    return send_file(
-        filepath,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    # 按批读取元组并边生成边输出，CSV 和 xlsx 都不生成临时文件
+    if request.args.get('format') == 'csv':
+        return Response(
+            stream_with_context(iter_members_csv()),
+            mimetype='text/csv',
+            headers=export_headers()
+        )
+    
+    return Response(
+        stream_with_context(iter_members_xlsx()),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers=export_headers()
     )
 
 @member_bp.route('/search', methods=['GET'])
 @handle_error
 def search_members():
-    term = request.args.get('term', '')
-    print(f"搜索關鍵詞: {term}")
+    term = request.args.get('term', '').strip()
+    # 结果数量上限，默认 50，最多 500
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
     
     if not term:
-        print("警告：搜索關鍵詞為空")
         return jsonify([])
     
-    # 在多个字段中搜索
-    search_query = or_(
-        Member.中文姓名.ilike(f'%{term}%'),
-        Member.英文姓名.ilike(f'%{term}%'),
-        Member.身份證號.ilike(f'%{term}%'),
-        Member.會員編號.ilike(f'%{term}%'),
-        Member.電話.ilike(f'%{term}%'),
-        Member.地址.ilike(f'%{term}%')
-    )
-    
-    members = Member.query.filter(search_query).all()
-    print(f"找到 {len(members)} 條記錄")
-    
-    result = [member.to_dict() for member in members]
-    print(f"返回數據: {result}")
+    # 在多个字段中搜索（全文索引，按相关度排序）
+    use_index = current_app.extensions.get('member_search_fts', False)
+    use_bigram = current_app.extensions.get('member_search_bigram', False)
+    members = member_search(term, limit, use_index=use_index, use_bigram=use_bigram)
+    # 搜索词可能是姓名或电话，只记录长度
+    logger.debug("搜索會員", term_length=len(term), results=len(members), sample=100)
     
-    return jsonify(result)
+    return jsonify([member.to_dict() for member in members])
 
 @member_bp.route('/update-excel', methods=['POST'])
 @handle_error
 def update_excel():
-    """手动更新Excel文件"""
-    try:
-        print("開始更新Excel文件...")
-        
-        # 获取所有会员数据
-        all_data = get_all_members_data()
-        print(f"獲取到 {len(all_data)} 條會員數據")
-        
-        if not all_data:
-            print("警告：沒有找到任何會員數據")
-            return jsonify({'error': '沒有找到任何會員數據'}), 404
-        
-        # 创建DataFrame并设置列顺序
-        columns = [
-            '會員編號', '中文姓名', '英文姓名', '性別', '出生日期', '年齡',
-            '身份證號', '電話', '電郵', '地址', '地區', '經濟狀況',
-            '職業', '教育程度', '婚姻狀況', '家庭人數', '緊急聯絡人',
-            '緊急聯絡電話', '入會日期', '會員狀態', '備註'
-        ]
-        
-        # 列名映射
-        column_mapping = {
-            '會籍': '會員編號',
-            '中文姓名': '中文姓名',
-            '英文姓名': '英文姓名',
-            '性別': '性別',
-            '年齡': '年齡',
-            '手提電話': '電話',
-            '地址': '地址',
-            '經濟狀況': '經濟狀況',
-            '婚姻狀況': '婚姻狀況',
-            '入會日期': '入會日期'
-        }
-        
-        try:
-            df = pd.DataFrame(all_data)
-            print(f"成功創建DataFrame，包含 {len(df)} 行數據")
-            print(f"DataFrame列: {df.columns.tolist()}")
-            
-            # 确保所有必需的列都存在
-            for col in columns:
-                if col not in df.columns:
-                    print(f"警告：列 {col} 不存在，添加空列")
-                    df[col] = None
-            
-            # 重新排序列
-            df = df[columns]
-            print(f"重新排序列後的DataFrame列: {df.columns.tolist()}")
-        except Exception as e:
-            print(f"創建DataFrame失敗: {str(e)}")
-            print(f"數據內容: {all_data}")
-            return jsonify({'error': f'創建數據表失敗: {str(e)}'}), 500
-        
-        # 获取Excel文件路径
-        excel_path = '/home/karos/JLife/update.xlsx'
-        print(f"正在更新Excel文件: {excel_path}")
-        
-        try:
-            # 如果文件存在，读取现有数据
-            if os.path.exists(excel_path):
-                try:
-                    existing_df = pd.read_excel(excel_path)
-                    print(f"讀取到現有Excel文件，包含 {len(existing_df)} 行數據")
-                    print(f"現有Excel文件列: {existing_df.columns.tolist()}")
-                    
-                    # 如果现有文件没有正确的列名，尝试使用第一行作为列名
-                    if '會員編號' not in existing_df.columns:
-                        print("現有Excel文件列名不正確，嘗試使用第一行作為列名")
-                        existing_df.columns = existing_df.iloc[0]
-                        existing_df = existing_df.iloc[1:]
-                        existing_df = existing_df.reset_index(drop=True)
-                        print(f"調整後的列名: {existing_df.columns.tolist()}")
-                    
-                    # 重命名列
-                    for old_col, new_col in column_mapping.items():
-                        if old_col in existing_df.columns:
-                            existing_df = existing_df.rename(columns={old_col: new_col})
-                            print(f"重命名列: {old_col} -> {new_col}")
-                    
-                    # 确保现有数据的列名一致
-                    for col in columns:
-                        if col not in existing_df.columns:
-                            print(f"警告：現有Excel文件缺少列 {col}，添加空列")
-                            existing_df[col] = None
-                    existing_df = existing_df[columns]
-                    
-                    # 合并数据，避免重复
-                    df = pd.concat([existing_df, df], ignore_index=True)
-                    df = df.drop_duplicates(subset=['會員編號'], keep='last')
-                    print(f"合併後共有 {len(df)} 行數據")
-                except Exception as e:
-                    print(f"讀取現有Excel文件失敗: {str(e)}")
-                    print("將創建新的Excel文件")
-            
-            # 保存到Excel文件
-            try:
-                df.to_excel(excel_path, index=False, engine='openpyxl')
-                print(f"Excel文件已成功更新到: {excel_path}")
-            except Exception as e:
-                print(f"保存Excel文件失敗: {str(e)}")
-                return jsonify({'error': f'保存Excel文件失敗: {str(e)}'}), 500
-            
-            # 验证文件是否成功创建
-            if os.path.exists(excel_path):
-                file_size = os.path.getsize(excel_path)
-                print(f"文件已成功創建，大小: {file_size} 字節")
-            else:
-                print(f"警告：文件似乎沒有被創建: {excel_path}")
-                return jsonify({'error': '文件創建失敗'}), 500
-                
-        except Exception as e:
-            print(f"更新Excel文件失敗: {str(e)}")
-            return jsonify({'error': f'更新Excel文件失敗: {str(e)}'}), 500
-        
-        return jsonify({
-            'message': f'Excel文件已更新，共更新 {len(df)} 條記錄',
-            'path': excel_path
-        })
-    except Exception as e:
-        print(f"更新Excel文件失敗: {str(e)}")
-        import traceback
-        print(f"錯誤堆棧: {traceback.format_exc()}")
-        return jsonify({'error': f'更新Excel文件失敗: {str(e)}'}), 500 
\ No newline at end of file
+    """手动更新Excel文件：经由后台写入线程立即刷新（原子替换，与其他写入互斥）"""
+    if db.session.query(Member.id).first() is None:
+        logger.warning("沒有找到任何會員數據")
+        return jsonify({'error': '沒有找到任何會員數據'}), 404
+    
+    writer = get_excel_writer()
+    if not writer.flush():
+        return jsonify({'error': '更新Excel文件失敗'}), 500
+    
+    return jsonify({
+        'message': f'Excel文件已更新，共更新 {writer.rows} 條記錄',
+        'path': writer.path
+    })
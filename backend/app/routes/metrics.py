@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from ..utils.metrics import CONTENT_TYPE, get_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def export_metrics():
+    # Prometheus 文本格式：请求耗时、SQL 次数与耗时、导入及 Excel 写入耗时
+    return Response(get_metrics().render(), content_type=CONTENT_TYPE)
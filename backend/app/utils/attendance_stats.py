@@ -0,0 +1,25 @@
+from sqlalchemy import func, case
+from ..models.attendance import Event, Attendance
+from ..models.member import db
+
+
+def event_attendance_stats(*criteria):
+    """一次分组查询得出每个活动的报名人数和出席人数
+
+    活动与考勤记录左连接，没有考勤记录的活动也会返回（人数为 0）。
+    """
+    present = func.sum(case((Attendance.是否出席 == True, 1), else_=0))
+    rows = db.session.query(
+        Event,
+        func.count(Attendance.id).label('total'),
+        present.label('present')
+    ).outerjoin(
+        Attendance, Attendance.活動編號 == Event.活動編號
+    ).filter(*criteria).group_by(Event.id).order_by(Event.活動日期, Event.id).all()
+
+    return [{
+        'event': event.to_dict(),
+        'total_registered': total or 0,
+        'total_present': present or 0,
+        'attendance_rate': ((present or 0) / total * 100) if total else 0
+    } for event, total, present in rows]
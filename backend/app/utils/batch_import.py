@@ -0,0 +1,169 @@
+import os
+import glob
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from ..models.member import db
+from .bulk_loader import create_loader, DEFAULT_BATCH_SIZE
+from .excel_importer import IMPORT_SPECS, after_import
+from .import_jobs import parse_file_timed
+from .member_upsert import MemberUpserter
+from .import_validation import ImportValidationError
+from .metrics import record_import
+
+WORKBOOK_SUFFIXES = ('.xlsx', '.xls', '.ods')
+
+# 写入顺序：会员和活动先于考勤，考勤的外键才能对应上
+KIND_ORDER = ['members', 'events', 'inventory', 'attendance']
+
+# 文件名关键字 -> 导入类型
+KIND_KEYWORDS = [
+    ('member', 'members'),
+    ('inventory', 'inventory'),
+    ('event', 'events'),
+    ('attendance', 'attendance'),
+]
+
+
+def detect_kind(filename):
+    """根据文件名判断导入类型，无法判断时返回 None"""
+    name = os.path.basename(filename).lower()
+    for keyword, kind in KIND_KEYWORDS:
+        if keyword in name:
+            return kind
+    return None
+
+
+def collect_files(sources):
+    """展开目录和通配符，返回去重后的工作簿路径（保持给出的顺序）"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = sorted(os.path.join(source, name) for name in os.listdir(source))
+        else:
+            matches = sorted(glob.glob(source)) or [source]
+        for path in matches:
+            # 跳过 Excel 打开文件时生成的 ~$ 锁文件
+            if (path.lower().endswith(WORKBOOK_SUFFIXES) and not os.path.basename(path).startswith('~$')
+                    and path not in files):
+                files.append(path)
+    return files
+
+
+class FileResult:
+    """批量导入中单个文件的结果"""
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.status = 'pending'
+        self.rows = 0
+        self.parse_seconds = 0.0
+        self.write_seconds = 0.0
+        self.message = None
+
+    def to_dict(self):
+        return {
+            'file': self.path,
+            'kind': self.kind,
+            'status': self.status,
+            'rows': self.rows,
+            'parse_seconds': round(self.parse_seconds, 3),
+            'write_seconds': round(self.write_seconds, 3),
+            'message': self.message,
+        }
+
+    def summary(self):
+        line = (f"[{self.status}] {os.path.basename(self.path)} ({self.kind or '未知类型'})："
+                f"{self.rows} 行，解析 {self.parse_seconds:.2f} 秒，写入 {self.write_seconds:.2f} 秒")
+        return f"{line}，{self.message}" if self.message else line
+
+
+class BatchImporter:
+    """非交互批量导入
+
+    进程池并行解析工作簿，主进程按类型顺序（会员、活动、库存、考勤）逐个文件写库，
+    每个文件单独提交；同类文件全部写完后重建该类的汇总数据。为限制内存，
+    预先解析的文件数不超过 2 × 进程数。
+    """
+
+    def __init__(self, processes=None, batch_size=DEFAULT_BATCH_SIZE, upsert=False):
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.upsert = upsert
+
+    def plan(self, files):
+        """按写入顺序排列文件；无法判断类型的文件标为跳过"""
+        results = [FileResult(path, detect_kind(path)) for path in files]
+        for result in results:
+            if result.kind is None:
+                result.status = 'skipped'
+                result.message = '文件名须包含 member、inventory、event 或 attendance'
+        ordered = sorted((result for result in results if result.kind),
+                         key=lambda result: KIND_ORDER.index(result.kind))
+        return ordered, [result for result in results if result.kind is None]
+
+    def _writer(self, kind):
+        if self.upsert and kind == 'members':
+            return MemberUpserter(self.batch_size)
+        return create_loader(IMPORT_SPECS[kind]['model'], self.batch_size)
+
+    def _write(self, result, frame):
+        started = time.perf_counter()
+        try:
+            writer = self._writer(result.kind)
+            writer.write_frame(frame)
+            db.session.commit()
+            result.status = 'done'
+            result.message = writer.finish().summary()
+        except Exception as e:
+            db.session.rollback()
+            result.status = 'failed'
+            result.message = str(e)
+        result.write_seconds = time.perf_counter() - started
+
+    def run(self, files, report=None):
+        """导入全部文件，返回各文件的 FileResult；report(result) 在每个文件完成时调用"""
+        ordered, skipped = self.plan(files)
+        for result in skipped:
+            if report:
+                report(result)
+        pending = deque(ordered)
+        in_flight = deque()
+        written = set()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as pool:
+            def fill():
+                while pending and len(in_flight) < self.processes * 2:
+                    result = pending.popleft()
+                    in_flight.append((result, pool.submit(parse_file_timed, result.path, result.kind)))
+
+            fill()
+            while in_flight:
+                result, future = in_flight.popleft()
+                fill()
+                try:
+                    frame, result.parse_seconds = future.result()
+                except ImportValidationError as e:
+                    # 校验在子进程中完成，整个文件未写入
+                    result.status = 'failed'
+                    result.message = str(e)
+                except Exception as e:
+                    result.status = 'failed'
+                    result.message = f'解析失败: {e}'
+                else:
+                    result.rows = len(frame)
+                    self._write(result, frame)
+                    del frame
+                record_import(result.kind, result.status, result.parse_seconds + result.write_seconds,
+                              result.rows if result.status == 'done' else 0)
+                if result.status == 'done':
+                    written.add(result.kind)
+                # 该类型的最后一个文件处理完后重建汇总并递增版本号
+                if result.kind in written and not any(
+                        other.kind == result.kind for other, _ in in_flight):
+                    after_import(IMPORT_SPECS[result.kind]['model'])
+                if report:
+                    report(result)
+        return skipped + ordered
@@ -0,0 +1,293 @@
+import hashlib
+import threading
+import time
+from datetime import date
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, Response
+from sqlalchemy.exc import IntegrityError
+from ..models.member import db
+from ..models.version import TableVersion
+
+# 响应缓存的默认上限
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# 单条记录缓存的默认上限和有效期（秒）
+DEFAULT_ENTITY_ENTRIES = 2048
+DEFAULT_ENTITY_TTL = 60
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def _increment(table):
+    return TableVersion.query.filter_by(表名=table).update(
+        {TableVersion.版本: TableVersion.版本 + 1}, synchronize_session=False)
+
+
+def bump_version(*tables):
+    """数据表发生写入后递增其版本号（单独提交）"""
+    for table in tables:
+        if _increment(table):
+            continue
+        db.session.add(TableVersion(表名=table, 版本=1))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程已先插入同名记录
+            db.session.rollback()
+            _increment(table)
+    db.session.commit()
+
+
+def get_versions(*tables):
+    """返回 {表名: 版本}，尚无记录的表版本为 0"""
+    rows = dict(db.session.query(TableVersion.表名, TableVersion.版本)
+                .filter(TableVersion.表名.in_(tables)))
+    return {table: rows.get(table, 0) for table in tables}
+
+
+def bump_on_write(blueprint, *tables):
+    """蓝图内的写请求成功后，递增相关数据表的版本号"""
+    @blueprint.after_request
+    def _bump(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            bump_version(*tables)
+        return response
+    return _bump
+
+
+class LRUCache:
+    """按条数和总字节数限制的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while len(self._items) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """取得当前应用的响应缓存（首次使用时创建）"""
+    app = current_app._get_current_object()
+    with _response_cache_lock:
+        cache = app.extensions.get('response_cache')
+        if cache is None:
+            cache = LRUCache(
+                max_entries=app.config.get('RESPONSE_CACHE_ENTRIES', DEFAULT_CACHE_ENTRIES),
+                max_bytes=app.config.get('RESPONSE_CACHE_BYTES', DEFAULT_CACHE_BYTES)
+            )
+            app.extensions['response_cache'] = cache
+    return cache
+
+
+class EntityCache:
+    """单条记录的 LRU + TTL 缓存（线程安全），键为 (表名, 编号)
+
+    写接口和导入在提交后按键或按表失效。每个进程各有一份缓存，
+    其他进程的写入只能依靠 TTL 过期，因此有效期不宜过长。
+    """
+
+    def __init__(self, max_entries=DEFAULT_ENTITY_ENTRIES, ttl=DEFAULT_ENTITY_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._items = OrderedDict()
+        # 各表的失效计数；读取期间若有失效，读到的结果不写入缓存
+        self._epochs = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_load(self, table, key, loader):
+        """命中则返回缓存值，否则调用 loader() 读取；结果为 None 时不缓存"""
+        cache_key = (table, key)
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is not None:
+                value, expires = item
+                if expires > self._clock():
+                    self._items.move_to_end(cache_key)
+                    self.hits += 1
+                    return value
+                del self._items[cache_key]
+                self.expirations += 1
+            self.misses += 1
+            epoch = self._epochs.get(table, 0)
+
+        value = loader()
+        if value is None:
+            return None
+        with self._lock:
+            if self._epochs.get(table, 0) == epoch:
+                self._items[cache_key] = (value, self._clock() + self.ttl)
+                self._items.move_to_end(cache_key)
+                while len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, table, *keys):
+        with self._lock:
+            self._epochs[table] = self._epochs.get(table, 0) + 1
+            for key in keys:
+                if self._items.pop((table, key), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self, table=None):
+        """清除某个表（或全部）的缓存条目，例如批量导入之后"""
+        with self._lock:
+            tables = [table] if table else set(self._epochs) | {name for name, _ in self._items}
+            for name in tables:
+                self._epochs[name] = self._epochs.get(name, 0) + 1
+            keys = [key for key in self._items if table is None or key[0] == table]
+            for key in keys:
+                del self._items[key]
+            self.invalidations += len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._items),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+_entity_cache_lock = threading.Lock()
+
+
+def get_entity_cache():
+    """取得当前应用的单条记录缓存（首次使用时创建）"""
+    app = current_app._get_current_object()
+    with _entity_cache_lock:
+        cache = app.extensions.get('entity_cache')
+        if cache is None:
+            cache = EntityCache(
+                max_entries=app.config.get('ENTITY_CACHE_ENTRIES', DEFAULT_ENTITY_ENTRIES),
+                ttl=app.config.get('ENTITY_CACHE_TTL', DEFAULT_ENTITY_TTL)
+            )
+            app.extensions['entity_cache'] = cache
+    return cache
+
+
+def invalidate_entities(table, *keys):
+    """写入提交后使对应记录的缓存失效；空键忽略"""
+    get_entity_cache().invalidate(table, *[key for key in keys if key is not None])
+
+
+def _tee_stream(chunks, store, max_bytes):
+    """边输出边收集流式响应的内容，完整输出后再写入缓存
+
+    累计大小超过 max_bytes 时丢弃已收集的内容、不再收集，大文件导出的内存占用不随之增长。
+    """
+    collected = []
+    size = 0
+    for chunk in chunks:
+        if collected is not None:
+            size += len(chunk)
+            if size > max_bytes:
+                collected = None
+            else:
+                collected.append(chunk)
+        yield chunk
+    if collected is not None:
+        store(b''.join(collected))
+
+
+# 每次响应各不相同的头，不随正文缓存：Date 由服务器生成，Content-Disposition 中的文件名含导出时间
+UNCACHED_HEADERS = ('content-length', 'etag', 'date', 'content-disposition')
+
+
+def cached_by_version(*tables, daily=False, fresh_headers=None):
+    """按数据表版本缓存 GET 响应并支持 If-None-Match
+
+    缓存键和 ETag 由请求路径、查询参数和相关数据表的版本号组成；
+    任一表有写入后版本改变，旧条目不再命中，并随 LRU 淘汰。
+    daily=True 时键中加入当天日期，用于含年齡等按日期计算字段的接口。
+    UNCACHED_HEADERS 不缓存；命中时由 fresh_headers()（如有）返回的头重新生成。
+    文件响应（send_file）不缓存。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(*tables)
+            key = '|'.join([
+                request.path,
+                '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True))),
+                ','.join(f'{table}:{versions[table]}' for table in tables),
+                date.today().isoformat() if daily else ''
+            ])
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            if etag in request.if_none_match:
+                return Response(status=304, headers={'ETag': f'"{etag}"'})
+
+            cache = get_response_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                body, status, headers = cached[0]
+                response = Response(body, status=status, headers=headers)
+                if fresh_headers is not None:
+                    response.headers.update(fresh_headers())
+                response.set_etag(etag)
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.set_etag(etag)
+            headers = [(name, value) for name, value in response.headers
+                       if name.lower() not in UNCACHED_HEADERS]
+
+            def store(body):
+                cache.set(key, (body, 200, headers), len(body))
+
+            if response.direct_passthrough:
+                # 文件响应，读入内存会抵消流式发送的好处
+                return response
+            if response.is_streamed:
+                response.response = _tee_stream(response.response, store, cache.max_bytes)
+            else:
+                store(response.get_data())
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,41 @@
+from datetime import datetime
+from flask import current_app
+from ..models.attendance import Attendance
+from ..models.member import db
+from .rollup import dialect_insert
+
+# ON CONFLICT 依靠的唯一索引（见 Attendance.__table_args__）
+UNIQUE_INDEX = 'ix_attendance_member_event'
+
+
+def bulk_check_in(event_id, member_ids, when=None):
+    """在一个事务内为多名会员签到，返回 (新增数, 更新数)
+
+    依靠 (會員編號, 活動編號) 唯一索引做 ON CONFLICT 更新；不支持的数据库或唯一索引未能创建时
+    （表中已有重复记录，见 ensure_indexes）退回先查后写。重复的會員編號只计一次。
+    """
+    when = when or datetime.now()
+    member_ids = list(dict.fromkeys(member_ids))
+    table = Attendance.__table__
+    existing = {member_id for (member_id,) in db.session.query(Attendance.會員編號).filter(
+        Attendance.活動編號 == event_id, Attendance.會員編號.in_(member_ids))}
+    records = [{'會員編號': member_id, '活動編號': event_id, '是否出席': True, '簽到時間': when}
+               for member_id in member_ids]
+
+    insert = dialect_insert(db.engine.dialect.name)
+    if insert is not None and UNIQUE_INDEX not in current_app.extensions.get('missing_indexes', ()):
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['會員編號', '活動編號'],
+            set_={'是否出席': True, '簽到時間': statement.excluded.簽到時間, '更新時間': when})
+        db.session.execute(statement, records)
+    else:
+        if existing:
+            db.session.execute(table.update().where(
+                (table.c.活動編號 == event_id) & table.c.會員編號.in_(existing)
+            ).values(是否出席=True, 簽到時間=when, 更新時間=when))
+        new_records = [record for record in records if record['會員編號'] not in existing]
+        if new_records:
+            db.session.execute(table.insert(), new_records)
+    db.session.commit()
+    return len(member_ids) - len(existing), len(existing)
@@ -1,111 +1,184 @@
+import time
 import pandas as pd
-from datetime import datetime
 from ..models.member import Member, db
 from ..models.inventory import Inventory
 from ..models.attendance import Event, Attendance
+from .bulk_loader import create_loader, DEFAULT_BATCH_SIZE
+from .workbook_reader import iter_sheet_chunks
+from .sheet_cache import get_sheet_cache, read_excel_cached
+from .member_upsert import MemberUpserter
+from .import_validation import FrameValidator, ImportValidationError
+from .metrics import record_import
+from .cache import bump_version, get_entity_cache
+from .member_stats import rebuild_member_stats
+from .inventory_rollup import rebuild_inventory_rollup
+
+# 各类数据的导入定义：列名、别名、必填列、唯一键及需要按列整体转换类型的列（见 FrameValidator）
+MEMBER_SPEC = {
+    'model': Member,
+    'columns': [
+        '中文姓名', '英文姓名', '性別', '出生日期', '身份證號', '電話', '電郵',
+        '地址', '地區', '經濟狀況', '職業', '教育程度', '婚姻狀況', '家庭人數',
+        '緊急聯絡人', '緊急聯絡電話', '會員編號', '入會日期', '會員狀態', '備註'
+    ],
+    'aliases': {'中文姓名': ['姓名']},
+    'required': ['中文姓名'],
+    'unique': ['會員編號', '身份證號'],
+    'dates': ['出生日期', '入會日期'],
+    'integers': ['家庭人數'],
+}
+
+INVENTORY_SPEC = {
+    'model': Inventory,
+    'columns': [
+        '月份', '產品編號', '產品描述', '數量', '單位', '總重量_kg', '單價',
+        '總金額', '物資來源', '供應商', '存放位置', '備註'
+    ],
+    'required': ['月份', '產品編號'],
+    'dates': ['月份'],
+    'integers': ['數量'],
+    'floats': ['總重量_kg', '單價', '總金額'],
+}
+
+EVENT_SPEC = {
+    'model': Event,
+    'columns': [
+        '活動編號', '活動名稱', '活動日期', '活動時間', '活動地點', '活動類型',
+        '主辦單位', '負責人', '預計人數', '備註'
+    ],
+    'required': ['活動編號', '活動名稱', '活動日期'],
+    'unique': ['活動編號'],
+    'dates': ['活動日期'],
+    'times': ['活動時間'],
+    'integers': ['預計人數'],
+}
+
+ATTENDANCE_SPEC = {
+    'model': Attendance,
+    'columns': ['會員編號', '活動編號', '是否出席', '簽到時間', '簽退時間', '備註'],
+    'required': ['會員編號', '活動編號'],
+    'unique': [('會員編號', '活動編號')],
+    'datetimes': ['簽到時間', '簽退時間'],
+    'booleans': ['是否出席'],
+    'defaults': {'是否出席': False},
+}
+
+
+IMPORT_SPECS = {
+    'members': MEMBER_SPEC,
+    'inventory': INVENTORY_SPEC,
+    'events': EVENT_SPEC,
+    'attendance': ATTENDANCE_SPEC,
+}
+
+
+def prepare_frame(df, spec, validator=None):
+    """校验并按列整体转换类型，返回只含模型列、空值为 None 的 DataFrame
+
+    任何一行不符合导入定义时抛出 ImportValidationError（附逐行错误报告），不写入任何数据。
+    分块导入时传入同一个 validator，行号和唯一键检查跨块累计。
+    """
+    return (validator or FrameValidator(spec)).prepare(df)
+
+
+def after_import(model):
+    """批量写入提交后：重建派生的汇总数据、清除单条记录缓存并递增表版本号"""
+    if model is Member:
+        rebuild_member_stats()
+        db.session.commit()
+    elif model is Inventory:
+        rebuild_inventory_rollup()
+        db.session.commit()
+    get_entity_cache().clear(model.__tablename__)
+    bump_version(model.__tablename__)
+
+
+def _sheet_chunks(file_path, batch_size):
+    cache = get_sheet_cache()
+    chunks = cache.iter_chunks(file_path, batch_size) if cache is not None else None
+    if chunks is None:
+        chunks = iter_sheet_chunks(file_path, chunk_size=batch_size)
+    return chunks
+
+
+def validate_chunks(file_path, spec, batch_size):
+    """只校验不转换输出：逐块检查整个工作表，汇总所有块的错误后一次抛出 ImportValidationError"""
+    validator = FrameValidator(spec)
+    reports = [report for report in (validator.validate(chunk)[1]
+                                     for chunk in _sheet_chunks(file_path, batch_size)) if len(report)]
+    if reports:
+        errors = pd.concat(reports, ignore_index=True)
+        # 缺少必填列（无行号）的错误每块都会报告一次，只保留一条
+        errors = errors[errors['行號'].notna() | ~errors.duplicated()]
+        raise ImportValidationError(
+            errors.sort_values('行號', kind='stable', na_position='first', ignore_index=True))
+
+
+def iter_frames(file_path, spec, batch_size, stream=False):
+    """产出已完成类型转换的数据块；流式模式下逐块读取，每块转换后立即交给写入方
+
+    流式模式先把整个工作表逐块校验一遍，全部通过后才产出第一块，任何一行有错都不会写入数据；
+    因此工作表会读两遍，已缓存时从内存映射的缓存文件分块读取，否则只读逐行读取工作簿。
+    """
+    if stream:
+        validate_chunks(file_path, spec, batch_size)
+        validator = FrameValidator(spec)
+        for chunk in _sheet_chunks(file_path, batch_size):
+            yield prepare_frame(chunk, spec, validator)
+    else:
+        yield prepare_frame(read_excel_cached(file_path), spec)
+
 
 class ExcelImporter:
     @staticmethod
-    def import_members(file_path):
+    def _bulk_import(file_path, spec, label, batch_size, stream=False):
+        started = time.perf_counter()
+        kind = spec['model'].__tablename__
         try:
-            df = pd.read_excel(file_path)
-            for _, row in df.iterrows():
-                member = Member(
-                    中文姓名=row.get('中文姓名'),
-                    英文姓名=row.get('英文姓名'),
-                    年齡=row.get('年齡'),
-                    性別=row.get('性別'),
-                    出生日期=pd.to_datetime(row.get('出生日期')).date() if pd.notna(row.get('出生日期')) else None,
-                    身份證號=row.get('身份證號'),
-                    電話=row.get('電話'),
-                    電郵=row.get('電郵'),
-                    地址=row.get('地址'),
-                    地區=row.get('地區'),
-                    經濟狀況=row.get('經濟狀況'),
-                    職業=row.get('職業'),
-                    教育程度=row.get('教育程度'),
-                    婚姻狀況=row.get('婚姻狀況'),
-                    家庭人數=row.get('家庭人數'),
-                    緊急聯絡人=row.get('緊急聯絡人'),
-                    緊急聯絡電話=row.get('緊急聯絡電話'),
-                    會員編號=row.get('會員編號'),
-                    入會日期=pd.to_datetime(row.get('入會日期')).date() if pd.notna(row.get('入會日期')) else None,
-                    會員狀態=row.get('會員狀態'),
-                    備註=row.get('備註')
-                )
-                db.session.add(member)
+            loader = create_loader(spec['model'], batch_size)
+            for frame in iter_frames(file_path, spec, batch_size, stream):
+                loader.write_frame(frame)
             db.session.commit()
-            return True, "会员数据导入成功"
+            after_import(spec['model'])
+            result = loader.finish()
+            record_import(kind, 'done', time.perf_counter() - started, result.rows)
+            return True, f"{label}导入成功：{result.summary()}"
         except Exception as e:
             db.session.rollback()
-            return False, f"会员数据导入失败: {str(e)}"
+            record_import(kind, 'failed', time.perf_counter() - started)
+            return False, f"{label}导入失败: {str(e)}"
 
     @staticmethod
-    def import_inventory(file_path):
-        try:
-            df = pd.read_excel(file_path)
-            for _, row in df.iterrows():
-                inventory = Inventory(
-                    月份=pd.to_datetime(row.get('月份')).date() if pd.notna(row.get('月份')) else None,
-                    產品編號=row.get('產品編號'),
-                    產品描述=row.get('產品描述'),
-                    數量=row.get('數量'),
-                    單位=row.get('單位'),
-                    總重量_kg=row.get('總重量_kg'),
-                    單價=row.get('單價'),
-                    總金額=row.get('總金額'),
-                    物資來源=row.get('物資來源'),
-                    供應商=row.get('供應商'),
-                    存放位置=row.get('存放位置'),
-                    備註=row.get('備註')
-                )
-                db.session.add(inventory)
-            db.session.commit()
-            return True, "库存数据导入成功"
-        except Exception as e:
-            db.session.rollback()
-            return False, f"库存数据导入失败: {str(e)}"
+    def import_members(file_path, batch_size=DEFAULT_BATCH_SIZE, stream=False):
+        return ExcelImporter._bulk_import(file_path, MEMBER_SPEC, "会员数据", batch_size, stream)
 
     @staticmethod
-    def import_events(file_path):
+    def upsert_members(file_path, batch_size=DEFAULT_BATCH_SIZE, stream=False):
+        """按會員編號增量导入：新增插入、变更更新、未变更跳过"""
+        started = time.perf_counter()
         try:
-            df = pd.read_excel(file_path)
-            for _, row in df.iterrows():
-                event = Event(
-                    活動編號=row.get('活動編號'),
-                    活動名稱=row.get('活動名稱'),
-                    活動日期=pd.to_datetime(row.get('活動日期')).date() if pd.notna(row.get('活動日期')) else None,
-                    活動時間=pd.to_datetime(row.get('活動時間')).time() if pd.notna(row.get('活動時間')) else None,
-                    活動地點=row.get('活動地點'),
-                    活動類型=row.get('活動類型'),
-                    主辦單位=row.get('主辦單位'),
-                    負責人=row.get('負責人'),
-                    預計人數=row.get('預計人數'),
-                    備註=row.get('備註')
-                )
-                db.session.add(event)
+            upserter = MemberUpserter(batch_size)
+            for frame in iter_frames(file_path, MEMBER_SPEC, batch_size, stream):
+                upserter.write_frame(frame)
             db.session.commit()
-            return True, "活动数据导入成功"
+            after_import(Member)
+            result = upserter.finish()
+            record_import('members', 'done', time.perf_counter() - started,
+                          result.inserted + result.updated)
+            return True, f"会员数据增量导入成功：{result.summary()}"
         except Exception as e:
             db.session.rollback()
-            return False, f"活动数据导入失败: {str(e)}"
+            record_import('members', 'failed', time.perf_counter() - started)
+            return False, f"会员数据增量导入失败: {str(e)}"
 
     @staticmethod
-    def import_attendance(file_path):
-        try:
-            df = pd.read_excel(file_path)
-            for _, row in df.iterrows():
-                attendance = Attendance(
-                    會員編號=row.get('會員編號'),
-                    活動編號=row.get('活動編號'),
-                    是否出席=row.get('是否出席', False),
-                    簽到時間=pd.to_datetime(row.get('簽到時間')) if pd.notna(row.get('簽到時間')) else None,
-                    簽退時間=pd.to_datetime(row.get('簽退時間')) if pd.notna(row.get('簽退時間')) else None,
-                    備註=row.get('備註')
-                )
-                db.session.add(attendance)
-            db.session.commit()
-            return True, "考勤数据导入成功"
-        except Exception as e:
-            db.session.rollback()
-            return False, f"考勤数据导入失败: {str(e)}" 
\ No newline at end of file
+    def import_inventory(file_path, batch_size=DEFAULT_BATCH_SIZE, stream=False):
+        return ExcelImporter._bulk_import(file_path, INVENTORY_SPEC, "库存数据", batch_size, stream)
+
+    @staticmethod
+    def import_events(file_path, batch_size=DEFAULT_BATCH_SIZE, stream=False):
+        return ExcelImporter._bulk_import(file_path, EVENT_SPEC, "活动数据", batch_size, stream)
+
+    @staticmethod
+    def import_attendance(file_path, batch_size=DEFAULT_BATCH_SIZE, stream=False):
+        return ExcelImporter._bulk_import(file_path, ATTENDANCE_SPEC, "考勤数据", batch_size, stream)
@@ -0,0 +1,197 @@
+import os
+import atexit
+import logging
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
+import pandas as pd
+from flask import current_app
+from ..models.member import Member, db
+from .metrics import record_excel_write
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 两次写入之间的默认合并间隔（秒）
+DEFAULT_SYNC_INTERVAL = 5.0
+
+EXCEL_COLUMNS = [
+    '會員編號', '中文姓名', '英文姓名', '性別', '出生日期', '年齡',
+    '身份證號', '電話', '電郵', '地址', '地區', '經濟狀況',
+    '職業', '教育程度', '婚姻狀況', '家庭人數', '緊急聯絡人',
+    '緊急聯絡電話', '入會日期', '會員狀態', '備註'
+]
+
+# 旧版文件的列名
+COLUMN_MAPPING = {'會籍': '會員編號', '手提電話': '電話'}
+
+
+def default_excel_path():
+    """默认写入 backend/update.xlsx"""
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    return os.path.join(root_dir, 'update.xlsx')
+
+
+def compute_ages(birth_dates, today=None):
+    """按列计算年龄，与 Member.年齡 的规则一致"""
+    today = today or date.today()
+    born = pd.to_datetime(pd.Series(birth_dates))
+    before_birthday = (born.dt.month > today.month) | (
+        (born.dt.month == today.month) & (born.dt.day > today.day))
+    return (today.year - born.dt.year - before_birthday.astype(int)).astype('Int64')
+
+
+def load_members_frame():
+    """以元组方式读取会员表（不创建 ORM 对象），返回按 Excel 列排列的 DataFrame"""
+    columns = [col for col in EXCEL_COLUMNS if col != '年齡']
+    rows = db.session.query(*[getattr(Member, col) for col in columns]).all()
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df['年齡'] = compute_ages(df['出生日期'])
+    for col in ('出生日期', '入會日期'):
+        df[col] = df[col].map(lambda value: value.isoformat(), na_action='ignore')
+    return df[EXCEL_COLUMNS]
+
+
+def write_excel_atomic(df, path):
+    """先写入同目录下的临时文件，再原子替换目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.update-', suffix='.xlsx', dir=directory)
+    os.close(fd)
+    try:
+        df.to_excel(tmp_path, index=False, engine='openpyxl')
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """跨进程的排他锁（flock 锁文件）；没有 fcntl 的平台只有各进程内的锁"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def normalize_existing(existing):
+    """整理已有文件：表头不在第一行时改用第一行作为列名，旧列名改为现用列名"""
+    if '會員編號' not in existing.columns and len(existing):
+        existing.columns = existing.iloc[0]
+        existing = existing.iloc[1:].reset_index(drop=True)
+    existing = existing.rename(columns=COLUMN_MAPPING)
+    if '會員編號' not in existing.columns:
+        return None
+    return existing.reindex(columns=EXCEL_COLUMNS)
+
+
+class ExcelSyncWriter:
+    """update.xlsx 的后台写入线程
+
+    请求只需调用 mark_dirty()；写入线程在间隔内合并所有变更，统一刷新一次。
+    进程内的写入经由同一线程；每次刷新在 <path>.lock 上持有 flock，多个工作进程依次改写，
+    读取已有文件到原子替换之间不会被其他进程插入。各进程刷新时都读取整张会员表，最后写入的即为最新。
+    """
+
+    def __init__(self, app, path, interval=DEFAULT_SYNC_INTERVAL):
+        self.app = app
+        self.path = path
+        self.interval = interval
+        self._dirty = threading.Event()
+        self._stopping = False
+        self._flush_lock = threading.Lock()
+        # 文件中数据库已不存在的行（例如手工加入的会员）需要保留；按文件修改时间缓存
+        self._existing = None
+        self._existing_mtime = None
+        self.lock_path = f'{path}.lock'
+        self.rows = None
+        self._thread = threading.Thread(target=self._loop, name='excel-sync', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    def _loop(self):
+        while not self._stopping:
+            self._dirty.wait()
+            if self._stopping:
+                break
+            # 等待一个合并窗口，期间的所有变更只触发一次写入
+            time.sleep(self.interval)
+            self._dirty.clear()
+            self.flush()
+
+    def _existing_rows(self):
+        if not os.path.exists(self.path):
+            return None
+        mtime = os.path.getmtime(self.path)
+        if self._existing is None or mtime != self._existing_mtime:
+            self._existing = normalize_existing(pd.read_excel(self.path))
+            self._existing_mtime = mtime
+        return self._existing
+
+    def flush(self):
+        """立即把会员表写入 Excel 文件；写入的行数保存在 rows"""
+        with self._flush_lock, self.app.app_context():
+            started = time.perf_counter()
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with file_lock(self.lock_path):
+                    df = load_members_frame()
+                    existing = self._existing_rows()
+                    if existing is not None:
+                        df = pd.concat([existing, df], ignore_index=True)
+                        df = df.drop_duplicates(subset=['會員編號'], keep='last')
+                    write_excel_atomic(df, self.path)
+                    self._existing = df
+                    self._existing_mtime = os.path.getmtime(self.path)
+                self.rows = len(df)
+                record_excel_write('sync', 'done', time.perf_counter() - started, len(df))
+                logger.info("Excel文件已更新: %s (%d 行)", self.path, len(df))
+                return True
+            except Exception:
+                record_excel_write('sync', 'failed', time.perf_counter() - started)
+                logger.exception("更新Excel文件失败: %s", self.path)
+                return False
+            finally:
+                db.session.remove()
+
+    def stop(self):
+        """停止写入线程；仍有未写入的变更时先刷新一次"""
+        pending = self._dirty.is_set()
+        self._stopping = True
+        self._dirty.set()
+        if pending:
+            self.flush()
+
+
+_writer_lock = threading.Lock()
+
+
+def get_excel_writer():
+    """取得当前应用的 Excel 写入线程（首次使用时创建）"""
+    app = current_app._get_current_object()
+    with _writer_lock:
+        writer = app.extensions.get('excel_sync')
+        if writer is None:
+            writer = ExcelSyncWriter(
+                app,
+                app.config.get('EXCEL_SYNC_PATH') or default_excel_path(),
+                interval=app.config.get('EXCEL_SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL)
+            )
+            app.extensions['excel_sync'] = writer
+    return writer
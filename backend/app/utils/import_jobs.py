@@ -0,0 +1,292 @@
+import os
+import time
+import uuid
+import atexit
+import socket
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from ..models.member import db
+from ..models.job import ImportJobRecord
+from .bulk_loader import create_loader, DEFAULT_BATCH_SIZE
+from .excel_importer import IMPORT_SPECS, prepare_frame, iter_frames, after_import
+from .member_upsert import MemberUpserter
+from .import_validation import ImportValidationError
+from .metrics import record_import
+from .sheet_cache import read_excel_cached
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 app.config 中覆盖
+DEFAULT_WORKERS = 2
+DEFAULT_PARSE_PROCESSES = 2
+DEFAULT_JOB_HISTORY = 100
+# 任务记录中保留的校验错误条数
+DEFAULT_JOB_ERRORS = 1000
+# 运行中的任务每隔多少秒把进度写入任务表
+PROGRESS_INTERVAL = 1.0
+
+HOSTNAME = socket.gethostname()
+
+
+def parse_file(path, kind):
+    """在子进程中读取并转换整个工作表，避免解析时占用请求线程的 GIL"""
+    return prepare_frame(read_excel_cached(path), IMPORT_SPECS[kind])
+
+
+def parse_file_timed(path, kind):
+    """同 parse_file，另返回解析耗时（秒）"""
+    started = time.perf_counter()
+    frame = parse_file(path, kind)
+    return frame, time.perf_counter() - started
+
+
+class ImportJob:
+    """一个后台导入任务的状态；保存到 import_jobs 表，任何工作进程都可以查询"""
+
+    FIELDS = ['id', 'kind', 'filename', 'stream', 'upsert', 'batch_size', 'status', 'rows_parsed',
+              'rows_written', 'message', 'error', 'errors', 'owner', 'created_at', 'started_at', 'finished_at']
+
+    def __init__(self, kind, filename, stream=False, upsert=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.filename = filename
+        self.stream = stream
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.status = 'queued'
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.message = None
+        self.error = None
+        self.errors = []
+        # 预加载模式下模块在主进程导入，pid 须在创建任务时取
+        self.owner = f'{HOSTNAME}:{os.getpid()}'
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(job, field, getattr(record, field))
+        job.errors = job.errors or []
+        return job
+
+    def to_record(self):
+        return ImportJobRecord(**{field: getattr(self, field) for field in self.FIELDS})
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows_written / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def start(self):
+        self.status = 'running'
+        self.started_at = datetime.now()
+
+    def finish(self, status, message=None, error=None):
+        self.status = status
+        self.message = message
+        self.error = error
+        self.finished_at = datetime.now()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'mode': 'upsert' if self.upsert else 'insert',
+            'stream': self.stream,
+            'status': self.status,
+            'rows_parsed': self.rows_parsed,
+            'rows_written': self.rows_written,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'message': self.message,
+            'error': self.error,
+            'errors': self.errors,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+def _owner_exited(owner):
+    """任务所属进程在本机且已不存在（进程退出或服务重启）"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != HOSTNAME or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+class ImportJobManager:
+    """导入任务队列：有界线程池负责写库，进程池负责解析工作簿
+
+    任务在接收上传的进程中执行，状态在每次变化时（及运行中每 PROGRESS_INTERVAL 秒）写入
+    import_jobs 表，查询一律读表，多个工作进程或重启后都能查到。
+    任务表使用独立的会话，写入不会提交或回滚导入所在的 db.session。
+    """
+
+    def __init__(self, app, workers=DEFAULT_WORKERS, parse_processes=DEFAULT_PARSE_PROCESSES,
+                 history=DEFAULT_JOB_HISTORY):
+        self.app = app
+        self.history = history
+        self._session = sessionmaker(bind=db.get_engine(app, bind=ImportJobRecord.__bind_key__),
+                                     expire_on_commit=False)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-job')
+        # 使用 spawn，避免在多线程的服务进程中 fork
+        self._parsers = ProcessPoolExecutor(max_workers=parse_processes,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(self.shutdown)
+
+    def _save(self, job):
+        with self._session() as session:
+            session.merge(job.to_record())
+            session.commit()
+
+    def submit(self, file, kind, stream=False, upsert=False, batch_size=DEFAULT_BATCH_SIZE):
+        """保存上传文件到临时文件并排入队列，立即返回任务"""
+        if kind not in IMPORT_SPECS:
+            raise ValueError(f"未知的导入类型: {kind}")
+        if upsert and kind != 'members':
+            raise ValueError("只有会员数据支持增量导入")
+        filename = getattr(file, 'filename', None) or os.path.basename(str(file))
+        suffix = os.path.splitext(filename)[1] or '.xlsx'
+        fd, path = tempfile.mkstemp(prefix='jlife-import-', suffix=suffix)
+        with os.fdopen(fd, 'wb') as out:
+            if hasattr(file, 'save'):
+                file.save(out)
+            else:
+                with open(file, 'rb') as src:
+                    out.write(src.read())
+
+        job = ImportJob(kind, filename, stream=stream, upsert=upsert, batch_size=batch_size)
+        with self._session() as session:
+            session.add(job.to_record())
+            # 只保留最近的任务记录；排队或运行中的任务仍会被查询，不淘汰
+            recent = select(ImportJobRecord.id).order_by(ImportJobRecord.created_at.desc()).limit(self.history)
+            session.query(ImportJobRecord).filter(
+                ImportJobRecord.finished_at.isnot(None), ImportJobRecord.id.notin_(recent.scalar_subquery())
+            ).delete(synchronize_session=False)
+            session.commit()
+        self._executor.submit(self._run, job, path)
+        return job
+
+    def _load(self, records):
+        jobs = [ImportJob.from_record(record) for record in records]
+        interrupted = [job for job in jobs if job.active and _owner_exited(job.owner)]
+        for job in interrupted:
+            job.finish('failed', error='执行任务的进程已退出，任务中断')
+            self._save(job)
+        return jobs
+
+    def get(self, job_id):
+        with self._session() as session:
+            record = session.get(ImportJobRecord, job_id)
+        return self._load([record])[0] if record is not None else None
+
+    def list(self):
+        with self._session() as session:
+            records = session.query(ImportJobRecord).order_by(
+                ImportJobRecord.created_at.desc()).limit(self.history).all()
+        return self._load(records)
+
+    def _frames(self, job, path):
+        spec = IMPORT_SPECS[job.kind]
+        if job.stream:
+            # 流式模式逐块读取，内存只与块大小有关
+            return iter_frames(path, spec, job.batch_size, stream=True)
+        return [self._parsers.submit(parse_file, path, job.kind).result()]
+
+    def _writer(self, job):
+        if job.upsert:
+            return MemberUpserter(job.batch_size)
+        return create_loader(IMPORT_SPECS[job.kind]['model'], job.batch_size)
+
+    def _run(self, job, path):
+        with self.app.app_context():
+            try:
+                job.start()
+                self._save(job)
+                saved = time.monotonic()
+                writer = self._writer(job)
+                for frame in self._frames(job, path):
+                    job.rows_parsed += len(frame)
+                    for start in range(0, len(frame), job.batch_size):
+                        batch = frame.iloc[start:start + job.batch_size]
+                        writer.write_frame(batch)
+                        job.rows_written += len(batch)
+                        if time.monotonic() - saved >= PROGRESS_INTERVAL:
+                            self._save(job)
+                            saved = time.monotonic()
+                db.session.commit()
+                after_import(IMPORT_SPECS[job.kind]['model'])
+                job.finish('done', message=writer.finish().summary())
+            except ImportValidationError as e:
+                # 校验失败在写库前发生，保留逐行错误报告供前端显示
+                db.session.rollback()
+                job.errors = e.to_records(DEFAULT_JOB_ERRORS)
+                job.finish('invalid', error=str(e))
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("导入任务失败: %s", job.id)
+                job.finish('failed', error=str(e))
+            finally:
+                try:
+                    self._save(job)
+                except Exception:
+                    logger.exception("保存导入任务状态失败: %s", job.id)
+                record_import(job.kind, job.status, job.elapsed,
+                              job.rows_written if job.status == 'done' else 0)
+                db.session.remove()
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        self._parsers.shutdown(wait=False)
+
+
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """取得当前应用的导入任务管理器（首次使用时创建）"""
+    app = current_app._get_current_object()
+    with _manager_lock:
+        manager = app.extensions.get('import_jobs')
+        if manager is None:
+            manager = ImportJobManager(
+                app,
+                workers=app.config.get('IMPORT_WORKERS', DEFAULT_WORKERS),
+                parse_processes=app.config.get('IMPORT_PARSE_PROCESSES', DEFAULT_PARSE_PROCESSES),
+                history=app.config.get('IMPORT_JOB_HISTORY', DEFAULT_JOB_HISTORY)
+            )
+            app.extensions['import_jobs'] = manager
+    return manager
@@ -0,0 +1,273 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import String
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_numeric_dtype
+
+# 表头占工作表第 1 行，数据第 i 行（从 0 起）对应工作表第 i + 2 行
+FIRST_DATA_ROW = 2
+
+# 错误报告的列
+ERROR_COLUMNS = ['行號', '欄位', '值', '錯誤']
+
+# 异常信息中列出的错误条数及每个值显示的最大长度
+MESSAGE_ERRORS = 10
+MESSAGE_VALUE_LENGTH = 30
+
+TRUE_VALUES = {'1', '1.0', 'true', 't', 'yes', 'y', '是', '有', '出席', '✓', '√'}
+FALSE_VALUES = {'0', '0.0', 'false', 'f', 'no', 'n', '否', '無', '无', '缺席', '✗', '×'}
+
+
+class ImportValidationError(ValueError):
+    """导入数据未通过校验；errors 为逐行错误报告（行號 為工作表行号）"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+    @property
+    def row_count(self):
+        return int(self.errors['行號'].nunique())
+
+    def to_records(self, limit=None):
+        errors = self.errors if limit is None else self.errors.head(limit)
+        errors = errors.astype(object).where(errors.notna(), None)
+        return errors.to_dict('records')
+
+    def __str__(self):
+        lines = []
+        for error in self.to_records(MESSAGE_ERRORS):
+            where = f"第 {error['行號']} 行 " if error['行號'] is not None else ''
+            value = error['值']
+            if value is not None and len(value) > MESSAGE_VALUE_LENGTH:
+                value = value[:MESSAGE_VALUE_LENGTH] + '…'
+            value = f"「{value}」" if value is not None else ''
+            lines.append(f"{where}{error['欄位']}{value}：{error['錯誤']}")
+        more = '；……' if len(self.errors) > MESSAGE_ERRORS else ''
+        return (f"数据校验失败，共 {len(self.errors)} 处错误（{self.row_count} 行）：" +
+                '；'.join(lines) + more)
+
+
+def _errors(rows, column, values, message):
+    if isinstance(message, pd.Series):
+        message = message.to_numpy()
+    return pd.DataFrame({
+        '行號': pd.array(list(rows), dtype='Int64'),
+        '欄位': column,
+        '值': pd.Series(values, dtype=object).map(str, na_action='ignore').to_numpy(),
+        '錯誤': message,
+    })
+
+
+def _text(series):
+    """文本列：整数值的浮点去掉 .0，去除首尾空白，空字符串视为空值"""
+    if not series.notna().any():
+        # 工作表中没有的列（reindex 补上的全空列）
+        return pd.Series(pd.NA, index=series.index, dtype='string')
+    if is_float_dtype(series):
+        integral = series.notna() & (series % 1 == 0)
+        values = series.astype(object)
+        values[integral] = series[integral].astype('int64').astype(str)
+        values[series.notna() & ~integral] = series[series.notna() & ~integral].astype(str)
+    elif is_datetime64_any_dtype(series) or is_numeric_dtype(series) or is_bool_dtype(series):
+        values = series.astype(object).where(series.isna(), series.astype(str))
+    else:
+        values = series.astype(object)
+        floats = values.map(type) == float
+        if floats.any():
+            numbers = values[floats].astype(float)
+            integral = numbers.notna() & (numbers % 1 == 0)
+            values[floats & integral.reindex(values.index, fill_value=False)] = (
+                numbers[integral].astype('int64').astype(str))
+    values = values.astype('string').str.strip()
+    return values.mask(values == '')
+
+
+def _datetimes(series):
+    """整列解析日期时间；格式不一的少数单元格再逐个按混合格式解析，无法解析的为 NaT"""
+    if is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, errors='coerce')
+    retry = series.notna() & parsed.isna()
+    if retry.any():
+        parsed = parsed.astype('datetime64[ns]')
+        parsed[retry] = pd.to_datetime(series[retry].map(str), errors='coerce', format='mixed')
+    return parsed
+
+
+def _times(series):
+    # 单元格可能是 time 对象或字符串，统一转为字符串后整列解析
+    return pd.to_datetime(series.map(str, na_action='ignore'), errors='coerce', format='mixed')
+
+
+def _integers(series):
+    numbers = pd.to_numeric(series, errors='coerce')
+    return numbers.where(numbers % 1 == 0)
+
+
+def _booleans(series):
+    if is_bool_dtype(series):
+        return series.astype(object)
+    text = series.map(str, na_action='ignore').str.strip().str.lower()
+    values = pd.Series(None, index=series.index, dtype=object)
+    values[text.isin(TRUE_VALUES)] = True
+    values[text.isin(FALSE_VALUES)] = False
+    return values
+
+
+# 类型 -> (转换函数, 无法转换时的错误信息)
+COERCIONS = {
+    'dates': (_datetimes, '无法解析日期'),
+    'datetimes': (_datetimes, '无法解析日期时间'),
+    'times': (_times, '无法解析时间'),
+    'integers': (_integers, '不是整数'),
+    'floats': (lambda series: pd.to_numeric(series, errors='coerce'), '不是数字'),
+    'booleans': (_booleans, '无法识别的是/否值'),
+}
+
+
+class FrameValidator:
+    """按导入定义（IMPORT_SPECS）整列校验并转换数据
+
+    导入定义中的键：
+        columns   模型列
+        aliases   {列名: [别名, ...]}，工作表中没有该列而有别名时改用别名列
+        required  必填列
+        unique    唯一键，可为单列名或多列组成的元组；空值不参与比较
+        dates / datetimes / times / integers / floats / booleans  需要转换类型的列
+        defaults  空值时的默认值
+    其余列按文本处理，长度超过模型 String 长度的报错。
+
+    所有检查均为向量化的整列运算，在写库之前完成。流式导入时同一个实例依次校验各块，
+    行号和唯一键跨块累计。
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.rows = 0
+        self._seen = {self._key_columns(key): set() for key in spec.get('unique', [])}
+        typed = {col for kind in COERCIONS for col in spec.get(kind, [])}
+        self.text_columns = [col for col in spec['columns'] if col not in typed]
+        table = spec['model'].__table__
+        self.lengths = {
+            col: table.columns[col].type.length for col in self.text_columns
+            if col in table.columns and isinstance(table.columns[col].type, String)
+            and table.columns[col].type.length
+        }
+
+    @staticmethod
+    def _key_columns(key):
+        return (key,) if isinstance(key, str) else tuple(key)
+
+    def rename(self, df):
+        """去除列名首尾空白，并把别名列改为模型列名"""
+        df = df.rename(columns=lambda col: str(col).strip())
+        renames = {}
+        for col, aliases in self.spec.get('aliases', {}).items():
+            if col in df.columns:
+                continue
+            for alias in aliases:
+                if alias in df.columns:
+                    renames[alias] = col
+                    break
+        return df.rename(columns=renames)
+
+    def validate(self, df):
+        """返回 (转换后的 DataFrame, 错误报告)；错误报告为空表示校验通过"""
+        df = self.rename(df)
+        df = df.set_axis(np.arange(len(df)) + self.rows + FIRST_DATA_ROW, axis=0)
+        self.rows += len(df)
+        # 完全空白的行不导入
+        df = df.dropna(how='all')
+
+        errors = []
+        missing = [col for col in self.spec.get('required', []) if col not in df.columns]
+        if missing:
+            errors.append(_errors([None] * len(missing), missing, [None] * len(missing), '缺少必填列'))
+        frame = df.reindex(columns=self.spec['columns'])
+
+        invalid = {}
+        for kind, (coerce, message) in COERCIONS.items():
+            for col in self.spec.get(kind, []):
+                original = frame[col]
+                converted = coerce(original)
+                invalid[col] = original.notna() & converted.isna()
+                if invalid[col].any():
+                    errors.append(_errors(frame.index[invalid[col]], col, original[invalid[col]], message))
+                frame[col] = converted
+
+        for col in self.text_columns:
+            frame[col] = _text(frame[col])
+            length = self.lengths.get(col)
+            if length:
+                too_long = frame[col].str.len() > length
+                too_long = too_long.fillna(False).astype(bool)
+                if too_long.any():
+                    errors.append(_errors(frame.index[too_long], col, frame[col][too_long],
+                                          f'超过 {length} 个字符'))
+
+        for col, value in self.spec.get('defaults', {}).items():
+            frame[col] = frame[col].astype(object).where(frame[col].notna(), value)
+
+        for col in self.spec.get('required', []):
+            if col in missing:
+                continue
+            # 已因类型错误报告过的单元格不再重复报告为空
+            empty = frame[col].isna()
+            if col in invalid:
+                empty &= ~invalid[col]
+            if empty.any():
+                errors.append(_errors(frame.index[empty], col, [None] * int(empty.sum()), '必填字段为空'))
+
+        errors.extend(self._check_unique(frame))
+
+        if errors:
+            report = pd.concat(errors, ignore_index=True)
+            report = report.sort_values('行號', kind='stable', na_position='first', ignore_index=True)
+        else:
+            report = pd.DataFrame(columns=ERROR_COLUMNS)
+        return self._finish(frame), report
+
+    def _check_unique(self, frame):
+        errors = []
+        for columns, seen in self._seen.items():
+            parts = frame.loc[frame[list(columns)].notna().all(axis=1), list(columns)].astype(str)
+            keys = parts[columns[0]]
+            values = keys
+            for col in columns[1:]:
+                keys = keys + '\x1f' + parts[col]
+                values = values + '/' + parts[col]
+            label = '+'.join(columns)
+
+            duplicated = keys.duplicated(keep='first')
+            if duplicated.any():
+                first = keys.index.to_series().groupby(keys.to_numpy()).transform('first')
+                errors.append(_errors(keys.index[duplicated], label, values[duplicated],
+                                      '与第 ' + first[duplicated].astype(str) + ' 行重复'))
+            # 之前各块的键存于集合中，每块只需按本块行数查找
+            chunk = keys.to_numpy(dtype=object)
+            if not seen.isdisjoint(chunk):
+                earlier = np.fromiter((key in seen for key in chunk), dtype=bool, count=len(chunk))
+                earlier &= ~duplicated.to_numpy()
+                if earlier.any():
+                    errors.append(_errors(keys.index[earlier], label, values[earlier], '与之前的行重复'))
+            seen.update(chunk)
+        return errors
+
+    def _finish(self, frame):
+        for col in self.spec.get('integers', []):
+            frame[col] = frame[col].astype('Int64')
+        for col in self.spec.get('dates', []):
+            frame[col] = frame[col].dt.date
+        for col in self.spec.get('times', []):
+            frame[col] = frame[col].dt.time
+        for col in self.spec.get('datetimes', []):
+            frame[col] = pd.Series(frame[col].dt.to_pydatetime(), index=frame.index, dtype=object)
+        frame = frame.astype(object).reset_index(drop=True)
+        return frame.where(frame.notna(), None)
+
+    def prepare(self, df):
+        """校验并转换；有任何错误时抛出 ImportValidationError，不返回部分数据"""
+        frame, errors = self.validate(df)
+        if len(errors):
+            raise ImportValidationError(errors)
+        return frame
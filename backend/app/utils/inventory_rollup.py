@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import event, func
+from ..models.inventory import Inventory
+from ..models.member import db
+from ..models.stats import InventoryMonthly
+from .rollup import upsert_increment, changed_values
+
+KEY_FIELDS = ['月份', '產品描述', '物資來源']
+SUM_FIELDS = ['總重量_kg', '數量', '總金額']
+
+
+def _rollup_key(month, product, source):
+    """汇总键：月份取当月第一天，空的产品/来源以空字符串保存"""
+    return (month.replace(day=1), product or '', source or '')
+
+
+def _apply(connection, values, sign):
+    keys = dict(zip(KEY_FIELDS, _rollup_key(*[values[field] for field in KEY_FIELDS])))
+    increments = {field: sign * (values[field] or 0) for field in SUM_FIELDS}
+    increments['記錄數'] = sign
+    upsert_increment(connection, InventoryMonthly.__table__, keys, increments)
+
+
+def _values(target):
+    return {field: getattr(target, field) for field in KEY_FIELDS + SUM_FIELDS}
+
+
+@event.listens_for(Inventory, 'after_insert')
+def _after_insert(mapper, connection, target):
+    _apply(connection, _values(target), 1)
+
+
+@event.listens_for(Inventory, 'before_delete')
+def _before_delete(mapper, connection, target):
+    _apply(connection, _values(target), -1)
+
+
+@event.listens_for(Inventory, 'before_update')
+def _before_update(mapper, connection, target):
+    values = changed_values(connection, target, KEY_FIELDS + SUM_FIELDS)
+    if values is not None:
+        old, new = values
+        _apply(connection, old, -1)
+        _apply(connection, new, 1)
+
+
+def rebuild_inventory_rollup():
+    """按库存表重新生成月度汇总（批量导入后调用，对库存表只扫描一次）"""
+    grouped = db.session.query(
+        Inventory.月份, Inventory.產品描述, Inventory.物資來源,
+        func.sum(Inventory.總重量_kg), func.sum(Inventory.數量),
+        func.sum(Inventory.總金額), func.count()
+    ).group_by(Inventory.月份, Inventory.產品描述, Inventory.物資來源)
+
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for month, product, source, weight, count, amount, records in grouped:
+        total = totals[_rollup_key(month, product, source)]
+        total[0] += weight or 0
+        total[1] += count or 0
+        total[2] += amount or 0
+        total[3] += records
+
+    table = InventoryMonthly.__table__
+    db.session.execute(table.delete())
+    rows = [dict(zip(KEY_FIELDS, key), 總重量_kg=weight, 數量=count, 總金額=amount, 記錄數=records)
+            for key, (weight, count, amount, records) in totals.items()]
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+
+def ensure_inventory_rollup():
+    """汇总表为空但已有库存记录时重建"""
+    if InventoryMonthly.query.first() is None and Inventory.query.first() is not None:
+        rebuild_inventory_rollup()
+        db.session.commit()
+
+
+def read_yearly_stats(year):
+    """一次范围查询汇总表，得出按月重量、按产品和按来源的统计"""
+    rows = InventoryMonthly.query.filter(
+        InventoryMonthly.月份 >= date(year, 1, 1),
+        InventoryMonthly.月份 < date(year + 1, 1, 1),
+        InventoryMonthly.記錄數 > 0
+    ).all()
+
+    monthly = defaultdict(float)
+    products = defaultdict(lambda: [0.0, 0])
+    sources = defaultdict(float)
+    for row in rows:
+        monthly[row.月份.strftime('%m')] += row.總重量_kg
+        product = products[row.產品描述 or None]
+        product[0] += row.總重量_kg
+        product[1] += row.數量
+        sources[row.物資來源 or None] += row.總金額
+
+    def key(item):
+        return (item[0] is None, item[0] or '')
+
+    return {
+        'year': year,
+        'monthly_weight': [{'month': month, 'total_weight': weight}
+                           for month, weight in sorted(monthly.items())],
+        'product_stats': [{
+            'product': product,
+            'total_weight': weight,
+            'total_count': count
+        } for product, (weight, count) in sorted(products.items(), key=key)],
+        'source_stats': [{
+            'source': source,
+            'total_amount': amount
+        } for source, amount in sorted(sources.items(), key=key)]
+    }
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import itertools
+import logging.handlers
+
+# 默认配置，可在 app.config 中覆盖，环境变量 JLIFE_LOG_* 优先
+DEFAULT_LOG_LEVEL = 'INFO'
+DEFAULT_LOG_FORMAT = 'text'
+DEFAULT_LOG_QUEUE_SIZE = 10000
+
+# 各模块的默认级别；LOG_LEVELS 可覆盖
+DEFAULT_LOG_LEVELS = {
+    # SQL 计时另有慢查询日志，引擎自身的 INFO 日志会逐条输出语句
+    'sqlalchemy.engine': 'WARNING',
+}
+
+# LogRecord 自带的属性，其余 extra 属性视为结构化字段
+_RESERVED = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime', 'fields'}
+
+_lock = threading.Lock()
+_state = {}
+
+
+def _quote(value):
+    text = str(value)
+    if text == '' or any(ch in text for ch in ' ="\n\t'):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class StructuredFormatter(logging.Formatter):
+    """输出 key=value 形式（text）或每行一个 JSON 对象（json）的日志
+
+    结构化字段来自 StructuredLogger 的关键字参数或 extra={'fields': {...}}。
+    """
+
+    def __init__(self, fmt=DEFAULT_LOG_FORMAT):
+        super().__init__()
+        if fmt not in ('text', 'json'):
+            raise ValueError(f"未知的日志格式: {fmt}")
+        self.fmt = fmt
+
+    def format(self, record):
+        fields = dict(getattr(record, 'fields', None) or {})
+        fields.update({key: value for key, value in record.__dict__.items() if key not in _RESERVED})
+        message = record.getMessage()
+        exc_text = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if self.fmt == 'json':
+            payload = {
+                'time': self.formatTime(record),
+                'level': record.levelname,
+                'logger': record.name,
+                'message': message,
+                **fields,
+            }
+            if exc_text:
+                payload['exception'] = exc_text
+            return json.dumps(payload, ensure_ascii=False, default=str)
+        line = ' '.join([self.formatTime(record), record.levelname, record.name, message] +
+                        [f'{key}={_quote(value)}' for key, value in fields.items()])
+        return f'{line}\n{exc_text}' if exc_text else line
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """支持关键字字段和抽样的日志记录器
+
+        logger.info("搜索会员", results=3, elapsed_ms=1.2)
+        logger.debug("逐行处理", sample=1000, row=i)   # 每 1000 次只记录 1 次
+
+    级别未启用时在格式化和取字段之前就返回，关闭的 debug 日志几乎没有开销。
+    """
+
+    def __init__(self, logger):
+        super().__init__(logger, {})
+        self._counters = {}
+
+    def _sampled(self, msg, every):
+        counter = self._counters.get(msg)
+        if counter is None:
+            counter = self._counters.setdefault(msg, itertools.count())
+        # itertools.count 的 next 在 CPython 中是原子操作
+        return next(counter) % every == 0
+
+    def log(self, level, msg, *args, exc_info=None, stack_info=False, stacklevel=1, extra=None,
+            sample=None, **fields):
+        if not self.isEnabledFor(level):
+            return
+        if sample and sample > 1:
+            if not self._sampled(msg, sample):
+                return
+            fields['sample'] = sample
+        extra = dict(extra or {})
+        extra['fields'] = {**extra.get('fields', {}), **fields}
+        self.logger.log(level, msg, *args, exc_info=exc_info, stack_info=stack_info,
+                        stacklevel=stacklevel + 1, extra=extra)
+
+    def debug(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, *args, exc_info=True, **kwargs):
+        self.log(logging.ERROR, msg, *args, exc_info=exc_info, **kwargs)
+
+    def critical(self, msg, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.log(logging.CRITICAL, msg, *args, **kwargs)
+
+
+def get_logger(name):
+    """取得模块的结构化日志记录器，用法同 logging.getLogger(__name__)"""
+    return StructuredLogger(logging.getLogger(name))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃记录并计数，不阻塞请求线程"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 只合并参数和异常文本，格式化留给后台线程
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(text):
+    """解析 'app.routes=DEBUG,sqlalchemy.engine=INFO' 形式的模块级别"""
+    levels = {}
+    for item in (text or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _settings(app):
+    config = app.config if app is not None else {}
+    levels = {**DEFAULT_LOG_LEVELS, **config.get('LOG_LEVELS', {}), **parse_levels(os.environ.get('JLIFE_LOG_LEVELS'))}
+    return {
+        'level': (os.environ.get('JLIFE_LOG_LEVEL') or config.get('LOG_LEVEL', DEFAULT_LOG_LEVEL)).upper(),
+        'format': os.environ.get('JLIFE_LOG_FORMAT') or config.get('LOG_FORMAT', DEFAULT_LOG_FORMAT),
+        'queue_size': int(os.environ.get('JLIFE_LOG_QUEUE_SIZE') or config.get('LOG_QUEUE_SIZE', DEFAULT_LOG_QUEUE_SIZE)),
+        'levels': levels,
+    }
+
+
+def _start_listener(output):
+    log_queue = queue.Queue(maxsize=_state['queue_size'])
+    _state['handler'].queue = log_queue
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    _state['listener'] = listener
+
+
+def _restart_after_fork():
+    # 后台线程不随 fork 进入子进程（如 gunicorn 预加载后派生工作进程），子进程换新队列重新启动
+    if _state.get('listener') is not None:
+        _state['listener'] = None
+        _state['handler'].dropped = 0
+        _start_listener(_state['output'])
+
+
+def stop_logging():
+    """写出队列中剩余的日志并停止后台线程"""
+    with _lock:
+        listener = _state.get('listener')
+        if listener is None:
+            return
+        listener.stop()
+        _state['listener'] = None
+        dropped = _state['handler'].dropped
+        if dropped:
+            _state['output'].handle(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': '日志队列已满，丢弃的记录数', 'fields': {'dropped': dropped},
+            }))
+
+
+def configure_logging(app=None):
+    """配置进程的日志：结构化格式、分模块级别，经队列由后台线程写出
+
+    配置项（app.config，环境变量优先）：
+        LOG_LEVEL       根级别，默认 INFO（JLIFE_LOG_LEVEL）
+        LOG_LEVELS      {模块名: 级别}（JLIFE_LOG_LEVELS='app.routes=DEBUG,werkzeug=WARNING'，
+                        后者关闭开发服务器的逐请求访问日志）
+        LOG_FORMAT      text 或 json（JLIFE_LOG_FORMAT）
+        LOG_QUEUE_SIZE  队列长度，满时丢弃新记录（JLIFE_LOG_QUEUE_SIZE）
+    日志写到 stderr。重复调用时只更新级别，后台线程和处理器只建立一次。
+    """
+    settings = _settings(app)
+    root = logging.getLogger()
+    with _lock:
+        if 'handler' not in _state:
+            output = logging.StreamHandler(sys.stderr)
+            _state.update(output=output, handler=_QueueHandler(None), queue_size=settings['queue_size'])
+            _start_listener(output)
+            # 取代 basicConfig 等已安装的同步处理器
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            root.addHandler(_state['handler'])
+            atexit.register(stop_logging)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_restart_after_fork)
+        _state['output'].setFormatter(StructuredFormatter(settings['format']))
+        root.setLevel(settings['level'])
+        for name, level in settings['levels'].items():
+            logging.getLogger(name).setLevel(level)
+    return _state['handler']
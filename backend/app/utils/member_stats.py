@@ -0,0 +1,169 @@
+from collections import Counter
+from datetime import date
+from sqlalchemy import event, cast, func, literal, select, union_all
+from ..models.member import Member, db
+from ..models.stats import MemberStat
+from .rollup import upsert_increment, changed_values
+
+# 统计维度 -> 会员字段
+DIMENSIONS = {
+    'district': '地區',
+    'economic': '經濟狀況',
+}
+
+# 旧版本保存在统计表中的年龄计数，升级后由重建清除
+LEGACY_DIMENSIONS = ('age', 'age_as_of')
+
+# 年龄段宽度（岁）
+AGE_BAND_WIDTH = 10
+
+# 每条 UNION ALL 语句最多合并的计数子查询（SQLite 默认上限 500）
+MAX_COMPOUND = 200
+
+
+def _key(value):
+    """统计表主键不能为空，空值以空字符串保存"""
+    if value is None:
+        return ''
+    return str(value)
+
+
+def apply_deltas(connection, deltas):
+    """把 {(维度, 值): 增量} 累加到统计表"""
+    for (dimension, value), delta in deltas.items():
+        if delta:
+            upsert_increment(connection, MemberStat.__table__,
+                             {'維度': dimension, '值': value}, {'人數': delta})
+
+
+def _member_keys(values):
+    return [(dimension, _key(values.get(field))) for dimension, field in DIMENSIONS.items()]
+
+
+_FIELDS = list(DIMENSIONS.values())
+
+
+@event.listens_for(Member, 'after_insert')
+def _after_insert(mapper, connection, target):
+    apply_deltas(connection, Counter(_member_keys({field: getattr(target, field) for field in _FIELDS})))
+
+
+@event.listens_for(Member, 'before_delete')
+def _before_delete(mapper, connection, target):
+    deltas = Counter()
+    deltas.subtract(_member_keys({field: getattr(target, field) for field in _FIELDS}))
+    apply_deltas(connection, deltas)
+
+
+@event.listens_for(Member, 'before_update')
+def _before_update(mapper, connection, target):
+    values = changed_values(connection, target, _FIELDS)
+    if values is None:
+        return
+    old, new = values
+    deltas = Counter()
+    deltas.subtract(_member_keys(old))
+    deltas.update(_member_keys(new))
+    apply_deltas(connection, deltas)
+
+
+def rebuild_member_stats():
+    """按会员表重新汇总全部计数（批量导入后调用，每个维度一次 GROUP BY）"""
+    table = MemberStat.__table__
+    db.session.execute(table.delete())
+    for dimension, field in DIMENSIONS.items():
+        column = getattr(Member, field)
+        value = func.coalesce(cast(column, db.String), '')
+        grouped = select(literal(dimension), value, func.count()).group_by(value)
+        db.session.execute(table.insert().from_select(['維度', '值', '人數'], grouped))
+
+
+def ensure_member_stats():
+    """尚无计数但已有会员，或仍有旧版本的年龄计数时（例如升级后首次启动）重建计数"""
+    table = MemberStat.__table__
+    legacy = db.session.query(table.c.維度).filter(table.c.維度.in_(LEGACY_DIMENSIONS)).first()
+    empty = db.session.query(table.c.維度).first() is None
+    if legacy is not None or (empty and Member.query.first() is not None):
+        rebuild_member_stats()
+        db.session.commit()
+
+
+def _birthday(year, today):
+    """某年中与今天同月同日的日期；平年没有 2 月 29 日，以 2 月 28 日代替"""
+    try:
+        return today.replace(year=year)
+    except ValueError:
+        return today.replace(year=year, day=28)
+
+
+def age_counts(today=None):
+    """按今天的日期统计各周岁人数，返回 {年龄: 人数}，无出生日期的计在 None
+
+    只读 (出生年份, 出生日期) 索引：先按出生年份分组计数，再对每个年份用索引范围
+    统计今年生日未到（出生日期晚于当年的今天）的人数，这部分比按年份算出的年龄小一岁。
+    结果随日期变化但不写入任何数据。
+    """
+    today = today or date.today()
+    years = Counter(dict(db.session.query(Member.出生年份, func.count()).group_by(Member.出生年份)))
+    ages = Counter()
+    if None in years:
+        ages[None] = years.pop(None)
+    for year, count in years.items():
+        ages[today.year - year] += count
+
+    counts = [
+        select(literal(year), func.count()).select_from(Member.__table__).where(
+            Member.出生年份 == year, Member.出生日期 > _birthday(year, today))
+        for year in sorted(years)
+    ]
+    for start in range(0, len(counts), MAX_COMPOUND):
+        for year, before_birthday in db.session.execute(union_all(*counts[start:start + MAX_COMPOUND])):
+            ages[today.year - year] -= before_birthday
+            ages[today.year - year - 1] += before_birthday
+    return +ages
+
+
+def _age_band(age):
+    if age is None:
+        return None
+    start = age // AGE_BAND_WIDTH * AGE_BAND_WIDTH
+    return f'{start}-{start + AGE_BAND_WIDTH - 1}'
+
+
+def read_member_stats(today=None):
+    """从预先汇总的计数及出生年份索引生成统计结果，读取时不写入数据
+
+    地區、經濟狀況读取写入时增量维护的计数；年龄按今天的日期用索引范围计数（见 age_counts）。
+    """
+    table = MemberStat.__table__
+    rows = db.session.execute(
+        select(table.c.維度, table.c.值, table.c.人數).where(table.c.人數 > 0))
+    counts = {dimension: {} for dimension in DIMENSIONS}
+    for dimension, value, count in rows:
+        counts.setdefault(dimension, {})[value or None] = count
+
+    ages = age_counts(today)
+    bands = Counter()
+    for age, count in ages.items():
+        bands[_age_band(age)] += count
+
+    def sort_key(item):
+        return (item[0] is None, item[0] if item[0] is not None else 0)
+
+    def text_key(item):
+        return (item[0] is None, item[0] or '')
+
+    return {
+        'total_members': sum(counts['district'].values()),
+        'age_distribution': [{'age': age, 'count': count}
+                             for age, count in sorted(ages.items(), key=sort_key)],
+        'age_band_distribution': [
+            {'band': band, 'count': count}
+            for band, count in sorted(bands.items(), key=lambda item: (
+                item[0] is None, int(item[0].split('-')[0]) if item[0] else 0))
+        ],
+        'area_distribution': [{'area': area, 'count': count}
+                              for area, count in sorted(counts['district'].items(), key=text_key)],
+        'economic_distribution': [{'status': status, 'count': count}
+                                  for status, count in sorted(counts['economic'].items(), key=text_key)]
+    }
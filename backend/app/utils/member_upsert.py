@@ -0,0 +1,115 @@
+import time
+import pandas as pd
+from sqlalchemy import bindparam
+from ..models.member import Member, MemberFingerprint, db
+from .bulk_loader import create_loader, DEFAULT_BATCH_SIZE
+
+KEY = '會員編號'
+
+
+def row_fingerprints(frame):
+    """按行计算内容哈希（向量化），返回以会员编号为索引的 int64 Series"""
+    hashes = pd.util.hash_pandas_object(frame, index=False).astype('int64')
+    hashes.index = frame[KEY].values
+    return hashes
+
+
+class UpsertResult:
+    """增量导入结果"""
+
+    def __init__(self, inserted, updated, skipped, seconds):
+        self.inserted = inserted
+        self.updated = updated
+        self.skipped = skipped
+        self.seconds = seconds
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'seconds': round(self.seconds, 3)
+        }
+
+    def summary(self):
+        return (f"新增 {self.inserted} 条，更新 {self.updated} 条，"
+                f"未变更跳过 {self.skipped} 条，耗时 {self.seconds:.2f} 秒")
+
+
+class MemberUpserter:
+    """以会员编号为键的增量导入
+
+    每行内容先计算指纹，与 member_fingerprints 中保存的上次导入指纹比较：
+    未变化的行不访问数据库，变化的行批量更新，新会员批量插入。
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = max(int(batch_size), 1)
+        self.loader = create_loader(Member, self.batch_size)
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self._started = time.perf_counter()
+        # 一次性载入现有会员编号及指纹，之后各块只在内存中比较
+        self._existing = {key for (key,) in db.session.query(Member.會員編號)}
+        self._stored = dict(db.session.query(MemberFingerprint.會員編號, MemberFingerprint.指紋))
+
+    def write_frame(self, frame):
+        """处理一块已完成类型转换的数据"""
+        if frame[KEY].isna().any():
+            raise ValueError(f"有 {int(frame[KEY].isna().sum())} 行缺少會員編號，无法增量导入")
+        # 会员编号可能被读成数字，与数据库中的字符串统一；文件内重复的以最后一行为准
+        frame = frame.assign(**{KEY: frame[KEY].map(str)})
+        frame = frame.drop_duplicates(subset=[KEY], keep='last')
+        hashes = row_fingerprints(frame)
+
+        stored = hashes.index.map(self._stored.get)
+        unchanged = (stored == hashes.values)
+        is_new = ~hashes.index.map(self._existing.__contains__).to_numpy(dtype=bool)
+        changed = ~unchanged & ~is_new
+
+        self.skipped += int(unchanged.sum())
+        new_rows = frame[is_new]
+        changed_rows = frame[changed]
+        if len(new_rows):
+            self.loader.write_frame(new_rows)
+            self.inserted += len(new_rows)
+            self._existing.update(new_rows[KEY])
+        if len(changed_rows):
+            self._update(changed_rows)
+            self.updated += len(changed_rows)
+
+        written = hashes[~unchanged]
+        self._save_fingerprints(written)
+
+    def _update(self, frame):
+        table = Member.__table__
+        columns = [col for col in frame.columns if col != KEY]
+        # executemany 时 SET 子句由各记录的列名生成
+        statement = table.update().where(table.c[KEY] == bindparam('b_key'))
+        for start in range(0, len(frame), self.batch_size):
+            chunk = frame.iloc[start:start + self.batch_size]
+            records = chunk[columns].to_dict('records')
+            for record, key in zip(records, chunk[KEY]):
+                record['b_key'] = key
+            db.session.execute(statement, records)
+
+    def _save_fingerprints(self, hashes):
+        table = MemberFingerprint.__table__
+        fingerprints = create_loader(MemberFingerprint, self.batch_size)
+        pairs = [(key, int(value)) for key, value in zip(hashes.index, hashes.values)]
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start:start + self.batch_size]
+            db.session.execute(table.delete().where(table.c[KEY].in_([key for key, _ in batch])))
+            fingerprints.write([{KEY: key, '指紋': value} for key, value in batch])
+        self._stored.update(pairs)
+
+    def finish(self):
+        return UpsertResult(self.inserted, self.updated, self.skipped,
+                            time.perf_counter() - self._started)
+
+
+def forget_fingerprint(member_id):
+    """会员经由接口修改或删除后，清除其导入指纹，下次导入时按变更处理"""
+    if member_id:
+        MemberFingerprint.query.filter_by(會員編號=member_id).delete()
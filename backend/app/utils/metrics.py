@@ -0,0 +1,275 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 默认配置，可在 app.config 中覆盖
+DEFAULT_SLOW_REQUEST_SECONDS = 1.0
+DEFAULT_SLOW_QUERY_SECONDS = 0.2
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# 慢查询日志中 SQL 语句的最大长度；不记录参数，避免把会员资料写进日志
+STATEMENT_LOG_LENGTH = 300
+
+_OPERATION = re.compile(r'\s*(\w+)')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}'
+
+
+class Histogram:
+    """按上界分桶的分布，输出累计桶计数、总和及次数"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            values = sorted((labels, ([*counts], total, count))
+                            for labels, (counts, total, count) in self._values.items())
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                le = (('le', _format_number(float(bound))),)
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(float(total))}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}'
+
+
+class Metrics:
+    """应用内的性能指标，以 Prometheus 文本格式输出
+
+    指标保存在进程内；多进程部署时每个工作进程各自计数。
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self.requests = self.counter(
+            'jlife_http_requests_total', '请求数', ['method', 'endpoint', 'status'])
+        self.request_seconds = self.histogram(
+            'jlife_http_request_duration_seconds', '请求耗时（秒）', ['method', 'endpoint'])
+        self.response_bytes = self.histogram(
+            'jlife_http_response_size_bytes', '响应大小（字节，流式响应不计）', ['endpoint'], SIZE_BUCKETS)
+        self.response_rows = self.histogram(
+            'jlife_http_response_rows', '每个请求返回的记录数', ['endpoint'], COUNT_BUCKETS)
+        self.request_queries = self.histogram(
+            'jlife_http_request_sql_queries', '每个请求执行的 SQL 语句数', ['endpoint'], COUNT_BUCKETS)
+        self.request_sql_seconds = self.histogram(
+            'jlife_http_request_sql_seconds', '每个请求的 SQL 总耗时（秒）', ['endpoint'])
+        self.slow_requests = self.counter(
+            'jlife_slow_requests_total', '超过 SLOW_REQUEST_SECONDS 的请求数', ['endpoint'])
+        self.query_seconds = self.histogram(
+            'jlife_sql_query_duration_seconds', 'SQL 语句耗时（秒）', ['operation'])
+        self.slow_queries = self.counter(
+            'jlife_slow_queries_total', '超过 SLOW_QUERY_SECONDS 的 SQL 语句数', ['operation'])
+        self.import_seconds = self.histogram(
+            'jlife_import_duration_seconds', '导入耗时（秒）', ['kind', 'status'], JOB_BUCKETS)
+        self.import_rows = self.counter(
+            'jlife_import_rows_total', '导入写入的行数', ['kind'])
+        self.excel_write_seconds = self.histogram(
+            'jlife_excel_write_duration_seconds', 'Excel 写入耗时（秒）；target 为 sync（update.xlsx）或 export',
+            ['target', 'status'], JOB_BUCKETS)
+        self.excel_write_rows = self.counter(
+            'jlife_excel_write_rows_total', 'Excel 写入的行数', ['target'])
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def reset(self):
+        """清空所有计数（例如启动预热之后）"""
+        for metric in self._metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _endpoint():
+    # 以路由模板作为标签，避免每个会员编号各成一个时间序列
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def init_metrics(app, db):
+    """注册请求钩子和 SQL 引擎事件；在 create_app 中、首次连接数据库前调用"""
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+    slow_request = app.config.get('SLOW_REQUEST_SECONDS', DEFAULT_SLOW_REQUEST_SECONDS)
+    slow_query = app.config.get('SLOW_QUERY_SECONDS', DEFAULT_SLOW_QUERY_SECONDS)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+        g.response_rows = 0
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint()
+        metrics.requests.inc(request.method, endpoint, str(response.status_code))
+        metrics.request_seconds.observe(elapsed, request.method, endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            metrics.response_bytes.observe(response.content_length, endpoint)
+        metrics.response_rows.observe(g.response_rows, endpoint)
+        metrics.request_queries.observe(g.sql_queries, endpoint)
+        metrics.request_sql_seconds.observe(g.sql_seconds, endpoint)
+        if elapsed >= slow_request:
+            metrics.slow_requests.inc(endpoint)
+            logger.warning("慢请求", method=request.method, path=request.path, status=response.status_code,
+                           seconds=round(elapsed, 3), sql_queries=g.sql_queries,
+                           sql_seconds=round(g.sql_seconds, 3), rows=g.response_rows)
+        return response
+
+    engine = db.get_engine(app)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('query_started')
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        match = _OPERATION.match(statement)
+        operation = match.group(1).upper() if match else 'OTHER'
+        metrics.query_seconds.observe(elapsed, operation)
+        if has_request_context() and 'sql_queries' in g:
+            g.sql_queries += 1
+            g.sql_seconds += elapsed
+        if elapsed >= slow_query:
+            metrics.slow_queries.inc(operation)
+            logger.warning("慢查询", seconds=round(elapsed, 3), executemany=executemany,
+                           statement=' '.join(statement.split())[:STATEMENT_LOG_LENGTH])
+
+    return metrics
+
+
+def get_metrics():
+    """取得当前应用的指标；不在应用上下文中或未启用时返回 None"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('metrics')
+
+
+def record_rows(count):
+    """记录当前请求返回的记录数"""
+    if has_request_context() and 'response_rows' in g:
+        g.response_rows += count
+
+
+def record_import(kind, status, seconds, rows=0):
+    """记录一次导入（同步、后台任务或批量命令）的耗时和写入行数"""
+    metrics = get_metrics()
+    if metrics is None:
+        return
+    metrics.import_seconds.observe(seconds, kind, status)
+    if rows:
+        metrics.import_rows.inc(kind, amount=rows)
+
+
+def record_excel_write(target, status, seconds, rows=0):
+    """记录一次 Excel 写入（update.xlsx 同步或导出）的耗时和行数"""
+    metrics = get_metrics()
+    if metrics is None:
+        return
+    metrics.excel_write_seconds.observe(seconds, target, status)
+    if rows:
+        metrics.excel_write_rows.inc(target, amount=rows)
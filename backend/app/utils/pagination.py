@@ -0,0 +1,105 @@
+import base64
+import json
+from flask import request, jsonify
+from sqlalchemy import and_, or_
+from .serializers import json_response
+
+# 每页最多返回的记录数
+MAX_PER_PAGE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, value):
+    """把排序字段和最后一条记录的键值编码为不透明的游标"""
+    raw = json.dumps({'s': sort, 'v': value}, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _valid_key(value, nullable=False):
+    # 游标来自客户端，只接受字符串和整数，其他类型无法绑定为查询参数
+    if value is None:
+        return nullable
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def decode_cursor(token, sort, composite=False):
+    """解码游标；composite 时值为 [排序列的值, id]，排序列的值可以为空"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        value = data['v']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor('无效的分页游标') from e
+    if data.get('s') != sort:
+        raise InvalidCursor('分页游标与排序字段不一致')
+    if composite:
+        valid = (isinstance(value, list) and len(value) == 2 and _valid_key(value[0], nullable=True)
+                 and isinstance(value[1], int) and not isinstance(value[1], bool))
+    else:
+        valid = _valid_key(value)
+    if not valid:
+        raise InvalidCursor('无效的分页游标')
+    return value
+
+
+def _after(column, tiebreaker, cursor):
+    """(排序列, id) 之后的记录；空值排在最前（SQLite 索引的升序顺序）"""
+    value, last_id = cursor
+    if value is None:
+        return or_(and_(column.is_(None), tiebreaker > last_id), column.isnot(None))
+    # 先按 >= 取索引范围，再排除同值中已返回的记录
+    return and_(column >= value, or_(column > value, tiebreaker > last_id))
+
+
+def wants_keyset():
+    """?after=<游标> 或 ?cursor=1 时使用游标分页"""
+    return 'after' in request.args or request.args.get('cursor', 0, type=int) == 1
+
+
+def keyset_response(query, sort_keys, items_key, serializer):
+    """游标分页：按有索引的排序键取下一页，不使用 OFFSET
+
+    sort_keys 为 {参数名: 列}，第一个须为主键，作为默认排序和其他排序键的次序键：
+    其他排序按 (列, 主键) 排序，列可以为空且不必唯一。只有 ?with_total=1 时才执行 COUNT。
+    排序列须在 serializer 的输出字段中，记录以列元组查询。
+    """
+    tiebreaker_key = next(iter(sort_keys))
+    tiebreaker = sort_keys[tiebreaker_key]
+    sort = request.args.get('sort', tiebreaker_key)
+    if sort not in sort_keys:
+        return jsonify({'error': f'不支持的排序字段：{sort}'}), 400
+    column = sort_keys[sort]
+    composite = sort != tiebreaker_key
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
+
+    total = query.order_by(None).count() if request.args.get('with_total', 0, type=int) == 1 else None
+    after = request.args.get('after')
+    if after:
+        try:
+            cursor = decode_cursor(after, sort, composite)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(_after(column, tiebreaker, cursor) if composite else column > cursor)
+
+    # 多取一条，用来判断是否还有下一页
+    order = [column.asc().nullsfirst(), tiebreaker] if composite else [column]
+    rows = serializer.select(query).order_by(*order).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        value = getattr(last, column.key)
+        next_cursor = encode_cursor(sort, [value, getattr(last, tiebreaker.key)] if composite else value)
+
+    result = {
+        'per_page': per_page,
+        'next': next_cursor,
+        items_key: serializer.serialize(rows)
+    }
+    if total is not None:
+        result['total'] = total
+    return json_response(result)
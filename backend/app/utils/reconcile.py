@@ -0,0 +1,153 @@
+import time
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_numeric_dtype
+from .sheet_cache import read_excel_cached
+
+KEY = '會員編號'
+
+# 差异报告的列
+REPORT_COLUMNS = [KEY, '類型', '欄位', '原值', '新值']
+
+ADDED = '新增'
+REMOVED = '刪除'
+CHANGED = '變更'
+
+
+def canonical(series):
+    """把一列转为可比较的字符串：日期只保留日期，整数值的浮点去掉 .0，空白视为空值
+
+    不同文件中同一列可能被读成不同类型（如 float 与 object），统一后再比较。
+    """
+    if is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%d').astype('string')
+    if is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        return series.astype('Int64').astype('string')
+    if is_numeric_dtype(series) or is_bool_dtype(series):
+        return series.astype('string')
+    values = series.astype('string').str.strip()
+    values = values.str.replace(r'(?:\.0| 00:00:00)$', '', regex=True)
+    return values.mask(values == '')
+
+
+class Roster:
+    """以会员编号为索引、已统一格式的名单
+
+    缺少会员编号的行无法比对，另行计数；重复编号以最后一行为准。
+    """
+
+    def __init__(self, frame, key=KEY, renames=None):
+        frame = frame.rename(columns=renames or {})
+        frame = frame.loc[:, [col for col in frame.columns if not str(col).startswith('Unnamed:')]]
+        keys = canonical(frame[key])
+        self.missing_keys = int(keys.isna().sum())
+        frame = frame[keys.notna().to_numpy()]
+        keys = keys[keys.notna()]
+        self.duplicate_keys = int(keys.duplicated().sum())
+        frame = frame.set_axis(keys.to_numpy(), axis=0)
+        self.raw = frame[~frame.index.duplicated(keep='last')].drop(columns=[key])
+        self.raw.index.name = key
+        self.key = key
+
+    @classmethod
+    def read(cls, path, key=KEY, renames=None):
+        return cls(read_excel_cached(path), key=key, renames=renames)
+
+    @property
+    def columns(self):
+        return list(self.raw.columns)
+
+    def canonical(self, columns, keys):
+        rows = self.raw.loc[keys]
+        return pd.DataFrame({col: canonical(rows[col]) for col in columns}, index=rows.index)
+
+
+def row_hashes(frame):
+    """按行计算内容哈希（向量化）"""
+    return pd.util.hash_pandas_object(frame, index=False)
+
+
+class ReconcileResult:
+    """比对结果：新增、删除和变更的会员，以及逐字段差异"""
+
+    def __init__(self, old, new, columns, added, removed, diffs, seconds):
+        self.old = old
+        self.new = new
+        self.columns = columns
+        self.added = added
+        self.removed = removed
+        self.diffs = diffs
+        self.seconds = seconds
+
+    @property
+    def changed(self):
+        return self.diffs[KEY].unique()
+
+    def summary(self):
+        return (f"比对 {len(self.columns)} 个字段：新增 {len(self.added)} 人，删除 {len(self.removed)} 人，"
+                f"变更 {len(self.changed)} 人（{len(self.diffs)} 处字段差异），"
+                f"原名单重复编号 {self.old.duplicate_keys} 个、缺编号 {self.old.missing_keys} 行，"
+                f"新名单重复编号 {self.new.duplicate_keys} 个、缺编号 {self.new.missing_keys} 行，"
+                f"耗时 {self.seconds:.2f} 秒")
+
+    def report(self):
+        """差异明细（长表）：新增/删除每人一行，变更每个字段一行"""
+        added = pd.DataFrame({KEY: self.added, '類型': ADDED})
+        removed = pd.DataFrame({KEY: self.removed, '類型': REMOVED})
+        changed = self.diffs.assign(類型=CHANGED)
+        report = pd.concat([added, removed, changed], ignore_index=True)
+        return report.reindex(columns=REPORT_COLUMNS).sort_values([KEY, '類型'], kind='stable')
+
+    def write_report(self, path):
+        """写出差异报告：.csv 只写明细，其他格式另加摘要工作表"""
+        report = self.report()
+        if str(path).endswith('.csv'):
+            report.to_csv(path, index=False, encoding='utf-8-sig')
+            return
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame({'摘要': [self.summary()]}).to_excel(writer, sheet_name='摘要', index=False)
+            report.to_excel(writer, sheet_name='差異', index=False)
+
+
+def reconcile(old, new, columns=None):
+    """以会员编号比对两份名单
+
+    先按行哈希找出内容有变化的会员，只对这些行逐字段比较；全部为向量化运算。
+    columns 默认为两份名单共有的字段。
+    """
+    started = time.perf_counter()
+    if columns is None:
+        columns = [col for col in old.columns if col in set(new.columns)]
+
+    added = new.raw.index.difference(old.raw.index)
+    removed = old.raw.index.difference(new.raw.index)
+    common = old.raw.index.intersection(new.raw.index)
+
+    before = old.canonical(columns, common)
+    after = new.canonical(columns, common)
+    differs = row_hashes(before).to_numpy() != row_hashes(after).to_numpy()
+    before = before[differs]
+    after = after[differs]
+
+    # NA 与 NA 视为相同
+    mask = before.fillna('\0').ne(after.fillna('\0')).to_numpy()
+    rows, cols = mask.nonzero()
+    diffs = pd.DataFrame({
+        KEY: before.index[rows],
+        '欄位': pd.Index(columns)[cols],
+        '原值': before.to_numpy()[rows, cols],
+        '新值': after.to_numpy()[rows, cols],
+    })
+    return ReconcileResult(old, new, columns, added, removed, diffs, time.perf_counter() - started)
+
+
+def merge_roster(old, new, columns):
+    """以新名单为准生成 columns 格式的名单；新名单没有的字段按会员编号从原名单补上
+
+    columns 可取自已有名单文件的表头，两份名单都没有的列留空。
+    """
+    merged = new.raw.reindex(columns=[col for col in columns if col != new.key])
+    for col in merged.columns:
+        if col not in new.raw.columns and col in old.raw.columns:
+            merged[col] = old.raw[col].reindex(merged.index)
+    merged = merged.sort_index().reset_index()
+    return merged.reindex(columns=columns)
@@ -0,0 +1,64 @@
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import sqlite, postgresql
+
+_UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def dialect_insert(dialect_name):
+    """支持 ON CONFLICT 的 insert() 构造函数；其他数据库返回 None"""
+    return _UPSERT_DIALECTS.get(dialect_name)
+
+
+def upsert_increment(connection, table, keys, increments):
+    """汇总表按主键累加：记录不存在时插入，存在时把各列加上增量"""
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table).values(**keys, **increments)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + value for name, value in increments.items()}))
+        return
+
+    condition = None
+    for name, value in keys.items():
+        clause = table.c[name] == value
+        condition = clause if condition is None else condition & clause
+    updated = connection.execute(table.update().where(condition).values(
+        {name: table.c[name] + value for name, value in increments.items()})).rowcount
+    if not updated:
+        connection.execute(table.insert().values(**keys, **increments))
+
+
+def changed_values(connection, target, fields):
+    """在 before_update 中取得 (旧值, 新值)；各字段都未改变时返回 None
+
+    对象提交后会过期，此时旧值不在历史记录中，需要从数据库读取。
+    """
+    state = inspect(target)
+    old, new, missing = {}, {}, []
+    changed = False
+    for field in fields:
+        history = state.attrs[field].history
+        if history.added or history.deleted:
+            changed = True
+        if history.deleted:
+            old[field] = history.deleted[0]
+        elif history.unchanged:
+            old[field] = history.unchanged[0]
+        else:
+            missing.append(field)
+        if history.added:
+            new[field] = history.added[0]
+    if not changed:
+        return None
+
+    if missing:
+        table = state.mapper.local_table
+        row = connection.execute(
+            select(*[table.c[field] for field in missing]).where(
+                table.c.id == state.identity[0])
+        ).first()
+        old.update(zip(missing, row))
+    for field in fields:
+        new.setdefault(field, old[field])
+    return old, new
@@ -0,0 +1,55 @@
+import logging
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+from ..models.member import db
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_columns(app):
+    """create_all 不会给已存在的表补列；用 ALTER TABLE 补上可以直接添加的新列
+
+    只处理可为空且没有服务器端默认值的列和生成列（SQLite 只能添加 VIRTUAL 生成列，
+    Computed 未指定 persisted 时即为 VIRTUAL）。其他新列记录警告，需手工迁移。
+    """
+    for table in db.metadata.sorted_tables:
+        engine = db.get_engine(app, bind=table.info.get('bind_key'))
+        inspector = inspect(engine)
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if column.computed is None and (not column.nullable or column.server_default is not None):
+                logger.warning("%s 表缺少列 %s，无法自动添加", table.name, column.name)
+                continue
+            preparer = engine.dialect.identifier_preparer
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}')
+            logger.info("已为 %s 表添加列 %s", table.name, column.name)
+
+
+def ensure_indexes(app):
+    """create_all 不会给已存在的表补建索引；逐个检查并创建缺少的索引
+
+    返回未能创建的索引名集合，保存在 app.extensions['missing_indexes']，依赖索引的代码据此退回其他写法。
+    唯一索引失败通常是表中已有重复数据，需要清理后重启才会创建。
+    """
+    missing = set()
+    for table in db.metadata.sorted_tables:
+        engine = db.get_engine(app, bind=table.info.get('bind_key'))
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except SQLAlchemyError as e:
+                missing.add(index.name)
+                if index.unique:
+                    logger.error("创建唯一索引 %s 失败（%s 表中可能有重复的 %s），相关写入将退回较慢的方式: %s",
+                                 index.name, table.name, '+'.join(col.name for col in index.columns), e)
+                else:
+                    logger.warning("创建索引 %s 失败: %s", index.name, e)
+    app.extensions['missing_indexes'] = missing
+    return missing
@@ -0,0 +1,164 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from ..models.member import Member, db
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'members_fts'
+SEARCH_FIELDS = ['中文姓名', '英文姓名', '身份證號', '會員編號', '電話', '地址']
+
+# trigram 分词至少需要 3 个字符才能走索引
+MIN_MATCH_LENGTH = 3
+
+# 两个字的中文关键词（多为姓氏加名字）走二字组索引；搜索字段中只有这两个含中文
+BIGRAM_TABLE = 'members_bigram'
+BIGRAM_FIELDS = ['中文姓名', '地址']
+
+
+def _columns(prefix=''):
+    return ', '.join(f'{prefix}"{field}"' for field in SEARCH_FIELDS)
+
+
+def _ddl():
+    """外部内容 FTS5 表及保持同步的触发器"""
+    return [
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {_columns()}, content='members', content_rowid='id', tokenize='trigram')''',
+        f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON members BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {_columns()}) VALUES (new.id, {_columns('new.')});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON members BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns()})
+            VALUES ('delete', old.id, {_columns('old.')});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON members BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns()})
+            VALUES ('delete', old.id, {_columns('old.')});
+            INSERT INTO {FTS_TABLE}(rowid, {_columns()}) VALUES (new.id, {_columns('new.')});
+        END''',
+    ]
+
+
+def _bigrams(ref):
+    # 把文本拆成以空格分隔的二字组（「陳大文」→「陳大 大文」），unicode61 分词后每组是一个词
+    return (f"(WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < length({ref}) - 1) "
+            f"SELECT group_concat(substr({ref}, i, 2), ' ') FROM n)")
+
+
+def _bigram_columns(prefix=''):
+    return ', '.join(f'{prefix}"{field}"' for field in BIGRAM_FIELDS)
+
+
+def _bigram_values(prefix=''):
+    return ', '.join(_bigrams(f'{prefix}"{field}"') for field in BIGRAM_FIELDS)
+
+
+def _bigram_ddl():
+    """二字组 FTS5 表（自带内容，按 rowid 删除）及保持同步的触发器"""
+    return [
+        f'''CREATE VIRTUAL TABLE IF NOT EXISTS {BIGRAM_TABLE} USING fts5(
+            {_bigram_columns()}, tokenize='unicode61')''',
+        f'''CREATE TRIGGER IF NOT EXISTS {BIGRAM_TABLE}_ai AFTER INSERT ON members BEGIN
+            INSERT INTO {BIGRAM_TABLE}(rowid, {_bigram_columns()}) VALUES (new.id, {_bigram_values('new.')});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {BIGRAM_TABLE}_ad AFTER DELETE ON members BEGIN
+            DELETE FROM {BIGRAM_TABLE} WHERE rowid = old.id;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS {BIGRAM_TABLE}_au AFTER UPDATE OF {_bigram_columns()} ON members BEGIN
+            DELETE FROM {BIGRAM_TABLE} WHERE rowid = old.id;
+            INSERT INTO {BIGRAM_TABLE}(rowid, {_bigram_columns()}) VALUES (new.id, {_bigram_values('new.')});
+        END''',
+    ]
+
+
+def ensure_bigram_index(app):
+    """在 SQLite 上创建两字关键词用的二字组索引；新建时从现有数据填充。返回是否可用"""
+    engine = db.get_engine(app)
+    if engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with engine.begin() as conn:
+            existed = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (BIGRAM_TABLE,)
+            ).first() is not None
+            for statement in _bigram_ddl():
+                conn.exec_driver_sql(statement)
+            if not existed:
+                conn.exec_driver_sql(f"INSERT INTO {BIGRAM_TABLE}(rowid, {_bigram_columns()}) "
+                                     f"SELECT id, {_bigram_values()} FROM members")
+        return True
+    except OperationalError as e:
+        # 没有 FTS5 或触发器中不支持 WITH 子句的旧版 SQLite
+        logger.warning("会员二字组索引不可用，两字关键词将退回 LIKE 查询: %s", e)
+        return False
+
+
+def ensure_search_index(app):
+    """在 SQLite 上创建会员全文索引；新建时从现有数据重建。返回是否可用"""
+    engine = db.get_engine(app)
+    if engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with engine.begin() as conn:
+            existed = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+            ).first() is not None
+            for statement in _ddl():
+                conn.exec_driver_sql(statement)
+            if not existed:
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        return True
+    except OperationalError as e:
+        # SQLite 未编译 FTS5 或版本过旧（trigram 需要 3.34+）
+        logger.warning("会员全文索引不可用，搜索将退回 LIKE 查询: %s", e)
+        return False
+
+
+def _match_expression(term):
+    # 整个关键词作为一个短语，避免 FTS 查询语法字符被解释
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_member_ids(term, limit):
+    """用全文索引查找会员 id，按 bm25 相关度排序"""
+    rows = db.session.execute(text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query ORDER BY rank LIMIT :limit"
+    ), {'query': _match_expression(term), 'limit': limit})
+    return [row[0] for row in rows]
+
+
+def is_bigram_term(term):
+    """两个非 ASCII 文字（中文等）组成的关键词，二字组索引可以完整覆盖"""
+    return len(term) == 2 and all(not ch.isascii() and ch.isalnum() for ch in term)
+
+
+def search_bigram_ids(term, limit):
+    """用二字组索引查找会员 id，按 bm25 相关度排序"""
+    rows = db.session.execute(text(
+        f"SELECT rowid FROM {BIGRAM_TABLE} WHERE {BIGRAM_TABLE} MATCH :query ORDER BY rank LIMIT :limit"
+    ), {'query': _match_expression(term), 'limit': limit})
+    return [row[0] for row in rows]
+
+
+def search_members(term, limit, use_index=True, use_bigram=False):
+    """按关键词搜索会员，返回按相关度排序的 Member 列表
+
+    三个字以上用 trigram 全文索引，两个中文字用二字组索引；其余（单字、两个 ASCII 字符）
+    退回各字段的 LIKE 查询：按 id 顺序扫描，找到 limit 条即停止，匹配很少时会扫描全表。
+    """
+    ids = None
+    if use_index and len(term) >= MIN_MATCH_LENGTH:
+        ids = search_member_ids(term, limit)
+    elif use_bigram and is_bigram_term(term):
+        ids = search_bigram_ids(term, limit)
+    if ids is not None:
+        if not ids:
+            return []
+        members = {member.id: member for member in Member.query.filter(Member.id.in_(ids))}
+        return [members[member_id] for member_id in ids if member_id in members]
+
+    # 关键词太短或没有全文索引时退回 LIKE 查询
+    pattern = f'%{term}%'
+    search_query = db.or_(*[getattr(Member, field).ilike(pattern) for field in SEARCH_FIELDS])
+    return Member.query.filter(search_query).order_by(Member.id).limit(limit).all()
@@ -0,0 +1,122 @@
+import json
+from datetime import date, time
+from flask import abort, current_app
+from ..models.member import Member, calculate_age
+from ..models.inventory import Inventory
+from ..models.attendance import Event, Attendance
+from .cache import get_entity_cache
+from .metrics import record_rows
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化 {type(value).__name__}')
+
+
+def dumps(data):
+    """编码为 UTF-8 JSON；日期时间输出 ISO 格式，与 to_dict() 相同"""
+    sort_keys = current_app.config.get('JSON_SORT_KEYS', True)
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(data, default=_default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+class RowSerializer:
+    """直接查询列元组并转为字典，不创建 ORM 对象
+
+    fields 为输出字段及顺序（与模型 to_dict() 一致）；computed 为
+    {字段: (来源列, 函数)}，函数以来源列的值和当天日期计算派生字段（如年齡）。
+    """
+
+    def __init__(self, model, fields, computed=None):
+        self.model = model
+        self.fields = list(fields)
+        self.computed = computed or {}
+        self.selected = [field for field in self.fields if field not in self.computed]
+        for source, _ in self.computed.values():
+            if source not in self.selected:
+                self.selected.append(source)
+        self.columns = [getattr(model, field) for field in self.selected]
+        self._derived = sorted((self.fields.index(field), self.selected.index(source), func)
+                               for field, (source, func) in self.computed.items())
+        self._width = len(self.fields) - len(self.computed)
+
+    def select(self, query):
+        """把 Model.query 改为只查询所需的列"""
+        return query.with_entities(*self.columns)
+
+    def serialize(self, rows):
+        today = date.today()
+        fields = self.fields
+        width = self._width
+        if not self._derived:
+            result = [dict(zip(fields, row)) for row in rows]
+            record_rows(len(result))
+            return result
+        result = []
+        for row in rows:
+            values = list(row[:width])
+            for position, source, func in self._derived:
+                values.insert(position, func(row[source], today))
+            result.append(dict(zip(fields, values)))
+        record_rows(len(result))
+        return result
+
+    def first_or_404(self, query):
+        row = self.select(query).first()
+        if row is None:
+            abort(404)
+        return self.serialize([row])[0]
+
+    def cached_first_or_404(self, key, query):
+        """经单条记录缓存读取；缓存保存列元组，年齡等派生字段在返回时计算"""
+        row = get_entity_cache().get_or_load(
+            self.model.__tablename__, key, lambda: self.select(query).first())
+        if row is None:
+            abort(404)
+        return self.serialize([row])[0]
+
+
+MEMBER_SERIALIZER = RowSerializer(Member, [
+    'id', '中文姓名', '英文姓名', '年齡', '性別', '出生日期', '身份證號', '電話',
+    '電郵', '地址', '地區', '經濟狀況', '職業', '教育程度', '婚姻狀況', '家庭人數',
+    '緊急聯絡人', '緊急聯絡電話', '會員編號', '入會日期', '會員狀態', '備註',
+    '創建時間', '更新時間'
+], computed={'年齡': ('出生日期', calculate_age)})
+
+EVENT_SERIALIZER = RowSerializer(Event, [
+    'id', '活動編號', '活動名稱', '活動日期', '活動時間', '活動地點', '活動類型',
+    '主辦單位', '負責人', '預計人數', '備註', '創建時間', '更新時間'
+])
+
+ATTENDANCE_SERIALIZER = RowSerializer(Attendance, [
+    'id', '會員編號', '活動編號', '是否出席', '簽到時間', '簽退時間', '備註',
+    '創建時間', '更新時間'
+])
+
+INVENTORY_SERIALIZER = RowSerializer(Inventory, [
+    'id', '月份', '產品編號', '產品描述', '數量', '單位', '總重量_kg', '單價',
+    '總金額', '物資來源', '供應商', '存放位置', '備註', '創建時間', '更新時間'
+])
+
+
+def paginated_response(query, serializer, page, per_page, items_key):
+    """页码分页：只查询列元组，整页一次编码"""
+    pagination = serializer.select(query).paginate(page=page, per_page=per_page)
+    return json_response({
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': pagination.page,
+        items_key: serializer.serialize(pagination.items)
+    })
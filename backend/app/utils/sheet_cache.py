@@ -0,0 +1,310 @@
+import os
+import json
+import uuid
+import hashlib
+import stat
+import logging
+import threading
+from datetime import date, datetime, time
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # 未安装 pyarrow 时不使用缓存，直接读取工作簿
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# 缓存文件格式版本；格式变化时递增，使旧缓存不再命中
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = '.arrow'
+DEFAULT_CACHE_MB = 1024
+
+# 缓存的是上传的会员名册（含身份證號、電話、地址），目录和文件只允许本用户读写
+DIRECTORY_MODE = 0o700
+FILE_MODE = 0o600
+
+
+def default_cache_directory():
+    """默认放在 backend/instance/sheet-cache（Flask 实例目录），不使用共享的临时目录"""
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(root_dir, 'instance', 'sheet-cache')
+
+
+def secure_directory(directory):
+    """建立权限为 0700 的目录；目录已存在时须属于当前用户，权限过宽的收紧为 0700"""
+    os.makedirs(directory, mode=DIRECTORY_MODE, exist_ok=True)
+    info = os.stat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise NotADirectoryError(directory)
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise PermissionError(f"缓存目录不属于当前用户: {directory}")
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(directory, DIRECTORY_MODE)
+
+# 混合类型的 object 列（如同一列既有数字又有文字）以文本加类型标记保存
+_MIXED_KEY = b'jlife_mixed'
+_TAG_PREFIX = '__type__'
+_TYPES = [
+    (bool, 'bool'),
+    (np.bool_, 'bool'),
+    (int, 'int'),
+    (np.integer, 'int'),
+    (float, 'float'),
+    (np.floating, 'float'),
+    (str, 'str'),
+    (datetime, 'datetime'),
+    (date, 'date'),
+    (time, 'time'),
+]
+_TAGS = ['', 'str', 'int', 'float', 'bool', 'datetime', 'date', 'time', 'nan', 'nat']
+_DECODERS = {
+    'nan': lambda text: float('nan'),
+    'nat': lambda text: pd.NaT,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': lambda text: text == 'True',
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat,
+    'time': time.fromisoformat,
+}
+
+
+class UnsupportedValue(TypeError):
+    pass
+
+
+def _type_name(value):
+    if value is pd.NaT:
+        return 'nat'
+    if isinstance(value, float) and value != value:
+        return 'nan'
+    for cls, name in _TYPES:
+        if isinstance(value, cls):
+            return name
+    raise UnsupportedValue(type(value).__name__)
+
+
+def _encode_mixed(series):
+    """返回 (文本列, 类型标记列)；None 的标记为 0，NaN/NaT 另有标记"""
+    tags = np.zeros(len(series), dtype='int8')
+    texts = np.full(len(series), None, dtype=object)
+    values = series.to_numpy()
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        name = _type_name(value)
+        tags[i] = _TAGS.index(name)
+        if name in ('datetime', 'date', 'time'):
+            texts[i] = value.isoformat()
+        elif name not in ('nan', 'nat'):
+            texts[i] = str(value)
+    return pd.Series(texts, index=series.index, dtype=object), pd.Series(tags, index=series.index)
+
+
+def _decode_mixed(texts, tags):
+    result = np.full(len(texts), None, dtype=object)
+    texts = texts.to_numpy(dtype=object)
+    tags = tags.to_numpy()
+    for tag in np.unique(tags):
+        if tag == 0:
+            continue
+        decode = _DECODERS[_TAGS[tag]]
+        positions = np.flatnonzero(tags == tag)
+        result[positions] = [decode(text) for text in texts[positions]]
+    return result
+
+
+def to_table(frame):
+    """DataFrame 转为 Arrow 表；无法直接转换的 object 列按混合类型编码"""
+    frame = frame.reset_index(drop=True)
+    mixed = []
+    for col in frame.columns:
+        if frame[col].dtype != object:
+            continue
+        try:
+            pa.array(frame[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            texts, tags = _encode_mixed(frame[col])
+            frame[col] = texts
+            frame[f'{_TAG_PREFIX}{col}'] = tags
+            mixed.append(col)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_MIXED_KEY] = json.dumps(mixed, ensure_ascii=False).encode('utf-8')
+    return table.replace_schema_metadata(metadata)
+
+
+def to_frame(table):
+    frame = table.to_pandas()
+    mixed = json.loads((table.schema.metadata or {}).get(_MIXED_KEY, b'[]'))
+    for col in mixed:
+        tag_column = f'{_TAG_PREFIX}{col}'
+        frame[col] = _decode_mixed(frame[col], frame.pop(tag_column))
+    return frame
+
+
+def content_hash(source):
+    """工作簿内容的 SHA-256；source 可以是路径或上传的文件对象"""
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    stream = getattr(source, 'stream', source)
+    position = stream.tell()
+    for block in iter(lambda: stream.read(1 << 20), b''):
+        digest.update(block)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+class SheetCache:
+    """把解析后的工作表以 Arrow IPC 格式保存在磁盘上
+
+    键为工作簿内容哈希加工作表名，与文件名和修改时间无关；命中时以内存映射方式读取。
+    目录总大小超过上限时按最近使用时间淘汰。
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        secure_directory(directory)
+
+    def path_for(self, digest, sheet_name):
+        key = f'{CACHE_FORMAT_VERSION}:{digest}:{sheet_name}'
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + CACHE_SUFFIX)
+
+    def _open(self, path):
+        """以内存映射打开缓存文件并更新其使用时间；不存在或已损坏时返回 None"""
+        try:
+            source = pa.memory_map(path)
+            table = pa.ipc.open_file(source).read_all()
+            os.utime(path)
+            return table
+        except (FileNotFoundError, pa.ArrowInvalid, OSError):
+            return None
+
+    def _store(self, path, frame):
+        """写入缓存；缓存只是加速手段，写入或淘汰失败（磁盘满、目录被删等）时记录警告后放弃"""
+        try:
+            table = to_table(frame)
+        except UnsupportedValue as e:
+            logger.info("工作表含有无法缓存的值类型 %s，跳过缓存", e)
+            return
+        except pa.ArrowException as e:
+            logger.warning("工作表无法转换为 Arrow 格式，跳过缓存: %s", e)
+            return
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            # 先以 0600 建立文件，不受 umask 影响，再由 Arrow 写入
+            os.close(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, FILE_MODE))
+            with pa.OSFile(temp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+            self.evict()
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("写入工作表缓存失败，本次不缓存: %s", e)
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def read(self, source, sheet_name=0):
+        """读取工作表：命中缓存时不解析工作簿，否则解析后写入缓存"""
+        path = self.path_for(content_hash(source), sheet_name)
+        table = self._open(path)
+        if table is not None:
+            self.hits += 1
+            return to_frame(table)
+        self.misses += 1
+        frame = pd.read_excel(source, sheet_name=sheet_name)
+        self._store(path, frame)
+        return frame
+
+    def iter_chunks(self, source, chunk_size, sheet_name=0):
+        """已缓存时按块产出工作表（只读映射，逐块转换）；未缓存时返回 None"""
+        table = self._open(self.path_for(content_hash(source), sheet_name))
+        if table is None:
+            return None
+        self.hits += 1
+
+        def chunks():
+            for start in range(0, table.num_rows, chunk_size):
+                yield to_frame(table.slice(start, chunk_size))
+        return chunks()
+
+    def evict(self):
+        """总大小超过上限时，从最久未使用的缓存文件开始删除"""
+        with self._lock:
+            entries = []
+            try:
+                with os.scandir(self.directory) as scan:
+                    for entry in scan:
+                        if not entry.name.endswith(CACHE_SUFFIX):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            # 列出目录后被其他进程淘汰
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError as e:
+                logger.warning("无法列出工作表缓存目录，跳过淘汰: %s", e)
+                return
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("删除工作表缓存文件失败: %s", e)
+                    continue
+                total -= size
+
+
+_sheet_cache = None
+_sheet_cache_lock = threading.Lock()
+
+
+def get_sheet_cache():
+    """取得工作表缓存；未安装 pyarrow、JLIFE_SHEET_CACHE=0 或缓存目录不安全时返回 None
+
+    目录和上限由 JLIFE_SHEET_CACHE_DIR、JLIFE_SHEET_CACHE_MB 指定，命令行脚本和应用共用；
+    默认目录为 backend/instance/sheet-cache。
+    """
+    global _sheet_cache
+    if pa is None or os.environ.get('JLIFE_SHEET_CACHE', '1') == '0':
+        return None
+    with _sheet_cache_lock:
+        if _sheet_cache is None:
+            directory = os.environ.get('JLIFE_SHEET_CACHE_DIR') or default_cache_directory()
+            max_mb = int(os.environ.get('JLIFE_SHEET_CACHE_MB', DEFAULT_CACHE_MB))
+            try:
+                _sheet_cache = SheetCache(directory, max_mb * 1024 * 1024)
+            except OSError as e:
+                # 不把名册写进别人可读的目录；本进程内不再尝试
+                logger.warning("工作表缓存目录不可用，停用缓存: %s", e)
+                _sheet_cache = False
+    return _sheet_cache or None
+
+
+def read_excel_cached(source, sheet_name=0):
+    """经缓存读取工作表，用法同 pd.read_excel(source, sheet_name=...)"""
+    cache = get_sheet_cache()
+    # sheet_name=None 读取全部工作表，返回字典，不经缓存
+    if cache is None or sheet_name is None:
+        return pd.read_excel(source, sheet_name=sheet_name)
+    return cache.read(source, sheet_name)
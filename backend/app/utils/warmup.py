@@ -0,0 +1,72 @@
+import time
+from ..models.member import db
+from .metrics import get_metrics
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 启动时预先请求的接口：填充 SQLAlchemy 语句编译缓存、响应缓存，并导入各接口用到的模块
+DEFAULT_WARMUP_PATHS = [
+    '/api/members/?page=1&per_page=10',
+    '/api/members/?per_page=50&cursor=1',
+    '/api/members/stats',
+    '/api/members/search?term=0',
+    '/api/inventory/',
+    '/api/inventory/stats/yearly',
+    '/api/attendance/',
+    '/api/attendance/events',
+]
+
+
+def warm_up(app, paths=None):
+    """在接受请求之前依次请求常用接口；失败只记录日志，不影响启动
+
+    预加载模式下在 gunicorn 主进程中执行，缓存和已导入的模块由各工作进程继承。
+    预热请求不计入性能指标。
+    """
+    started = time.perf_counter()
+    client = app.test_client()
+    warmed = 0
+    for path in DEFAULT_WARMUP_PATHS if paths is None else paths:
+        try:
+            response = client.get(path)
+            response.get_data()
+            if response.status_code < 400:
+                warmed += 1
+            else:
+                logger.warning("预热请求失败", path=path, status=response.status_code)
+        except Exception:
+            logger.exception("预热请求失败", path=path)
+    with app.app_context():
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.reset()
+    logger.info("预热完成", paths=warmed, seconds=round(time.perf_counter() - started, 3))
+    return warmed
+
+
+def release_connections(app):
+    """关闭连接池（主库及各绑定库）中的所有连接；fork 之前调用，子进程不与主进程共用数据库连接"""
+    with app.app_context():
+        db.session.remove()
+        for bind in [None, *(app.config.get('SQLALCHEMY_BINDS') or {})]:
+            db.get_engine(app, bind=bind).dispose()
+
+
+def warm_connections(app, count):
+    """预先建立 count 个数据库连接放入连接池（连接时执行 PRAGMA），首批请求不必等待连接"""
+    with app.app_context():
+        engine = db.get_engine(app)
+        size = getattr(engine.pool, 'size', None)
+        if callable(size):
+            count = min(count, size())
+        connections = []
+        try:
+            for _ in range(max(count, 1)):
+                connection = engine.connect()
+                connection.exec_driver_sql('SELECT 1')
+                connections.append(connection)
+        finally:
+            for connection in connections:
+                connection.close()
+    return len(connections)
@@ -0,0 +1,60 @@
+import os
+import pandas as pd
+from openpyxl import load_workbook
+
+# 流式读取时每块的默认行数
+DEFAULT_CHUNK_SIZE = 1000
+
+STREAMABLE_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def _source_name(source):
+    """取得文件名（路径或上传的 FileStorage）"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, 'filename', None) or getattr(source, 'name', '') or ''
+
+
+def can_stream(source):
+    """只读逐行模式只支持 OOXML 格式"""
+    return _source_name(source).lower().endswith(STREAMABLE_EXTENSIONS)
+
+
+def iter_sheet_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, sheet_name=None):
+    """以只读模式逐行读取工作表，每 chunk_size 行产出一个 DataFrame
+
+    峰值内存只与 chunk_size 有关，与文件大小无关。第一行为表头。
+    """
+    if not can_stream(source):
+        raise ValueError(f"流式导入仅支持 {'/'.join(STREAMABLE_EXTENSIONS)} 文件")
+    chunk_size = max(int(chunk_size), 1)
+    # Flask 上传文件需要传入底层的可寻址文件对象
+    workbook = load_workbook(getattr(source, 'stream', source), read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # 去掉表头末尾的空列
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        columns = [str(name).strip() if name is not None else f'Unnamed: {i}'
+                   for i, name in enumerate(header[:width])]
+
+        buffer = []
+        for row in rows:
+            values = row[:width]
+            if all(value is None for value in values):
+                continue
+            if len(values) < width:
+                values = values + (None,) * (width - len(values))
+            buffer.append(values)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
@@ -0,0 +1,140 @@
+"""在不同数据库上运行同一组导入检查并计时
+
+生成合成的会员/活动/考勤/库存工作簿，依次执行全量导入和增量导入，
+核对记录数、特殊字符往返、默认列和统计汇总，输出每种数据库的耗时。
+
+用法:
+    python benchmarks/import_backends.py                       # 临时 SQLite 文件
+    python benchmarks/import_backends.py --reset postgresql://user@localhost/jlife_test
+
+--reset 会清空目标数据库中的全部数据表，只能用于测试库。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from app import create_app
+from app.models.member import Member, db
+from app.models.inventory import Inventory
+from app.models.attendance import Event, Attendance
+from app.utils.excel_importer import ExcelImporter
+from app.utils.member_stats import read_member_stats
+from app.utils.schema import ensure_indexes
+
+# 用于检查转义的备注内容
+TRICKY_NOTE = 'tab\there\\path\nnew line "quoted"'
+
+
+def write_workbooks(directory, rows):
+    base = date(2024, 1, 1)
+    members = pd.DataFrame({
+        '中文姓名': [f'會員{i}' for i in range(rows)],
+        '出生日期': [base - timedelta(days=365 * 20 + i % 20000) for i in range(rows)],
+        '身份證號': [f'A{i:08d}' for i in range(rows)],
+        '會員編號': [f'M{i:08d}' for i in range(rows)],
+        '地區': [['九龍', '新界', '港島'][i % 3] for i in range(rows)],
+        '經濟狀況': [['綜援', '低收入', None][i % 3] for i in range(rows)],
+        '家庭人數': [i % 6 or None for i in range(rows)],
+        '備註': [TRICKY_NOTE if i == 0 else None for i in range(rows)],
+    })
+    events = pd.DataFrame({
+        '活動編號': [f'E{i:04d}' for i in range(50)],
+        '活動名稱': [f'活動{i}' for i in range(50)],
+        '活動日期': [base + timedelta(days=i) for i in range(50)],
+        '活動時間': ['10:00:00'] * 50,
+    })
+    attendance = pd.DataFrame({
+        '會員編號': [f'M{i:08d}' for i in range(rows)],
+        '活動編號': [f'E{i % 50:04d}' for i in range(rows)],
+        '是否出席': [i % 4 != 0 for i in range(rows)],
+        '簽到時間': [datetime(2024, 1, 1, 10) + timedelta(minutes=i % 600) for i in range(rows)],
+    })
+    inventory = pd.DataFrame({
+        '月份': [base + timedelta(days=31 * (i % 12)) for i in range(rows)],
+        '產品編號': [f'P{i % 20:03d}' for i in range(rows)],
+        '產品描述': [f'產品{i % 20}' for i in range(rows)],
+        '數量': [i % 10 + 1 for i in range(rows)],
+        '總重量_kg': [(i % 10 + 1) * 0.5 for i in range(rows)],
+        '總金額': [(i % 10 + 1) * 12.0 for i in range(rows)],
+        '物資來源': [['捐贈', '採購'][i % 2] for i in range(rows)],
+    })
+    paths = {}
+    for name, frame in [('members', members), ('events', events),
+                        ('attendance', attendance), ('inventory', inventory)]:
+        paths[name] = os.path.join(directory, f'{name}.xlsx')
+        frame.to_excel(paths[name], index=False)
+    # 修改前 10% 会员的电话，用于检查增量导入
+    changed = members.copy()
+    changed.loc[:rows // 10 - 1, '電話'] = '2345-6789'
+    paths['members_changed'] = os.path.join(directory, 'members_changed.xlsx')
+    changed.to_excel(paths['members_changed'], index=False)
+    return paths
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+
+def run(uri, paths, rows, reset):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': uri})
+    timings = {}
+    with app.app_context():
+        if reset:
+            db.drop_all()
+            db.create_all()
+            ensure_indexes(app)
+        elif Member.query.first() is not None:
+            raise SystemExit(f'{uri} 中已有会员数据，请使用空数据库或加 --reset')
+
+        steps = [
+            ('members', ExcelImporter.import_members, paths['members']),
+            ('events', ExcelImporter.import_events, paths['events']),
+            ('attendance', ExcelImporter.import_attendance, paths['attendance']),
+            ('inventory', ExcelImporter.import_inventory, paths['inventory']),
+            ('upsert_unchanged', ExcelImporter.upsert_members, paths['members']),
+            ('upsert_changed', ExcelImporter.upsert_members, paths['members_changed']),
+        ]
+        for name, importer, path in steps:
+            started = time.perf_counter()
+            success, message = importer(path)
+            timings[name] = round(time.perf_counter() - started, 3)
+            check(success, f'{name}: {message}')
+
+        check(Member.query.count() == rows, '会员数不符')
+        check(Event.query.count() == 50, '活动数不符')
+        check(Attendance.query.count() == rows, '考勤数不符')
+        check(Inventory.query.count() == rows, '库存数不符')
+        first = Member.query.filter_by(會員編號='M00000000').one()
+        check(first.備註 == TRICKY_NOTE, f'备注往返不一致: {first.備註!r}')
+        check(first.創建時間 is not None, '创建时间默认值缺失')
+        check(Member.query.filter_by(電話='2345-6789').count() == rows // 10, '增量更新数不符')
+        check(read_member_stats()['total_members'] == rows, '会员统计不符')
+        dialect = db.engine.dialect.name
+        db.session.remove()
+    return {'database': dialect, 'rows': rows, 'seconds': timings}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='在多种数据库上运行导入检查')
+    parser.add_argument('urls', nargs='*', help='数据库连接串，默认使用临时 SQLite 文件')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--reset', action='store_true', help='先清空目标数据库的数据表')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='jlife-import-')
+    paths = write_workbooks(directory, args.rows)
+    urls = args.urls or [f"sqlite:///{os.path.join(directory, 'import.db')}"]
+    for uri in urls:
+        print(json.dumps(run(uri, paths, args.rows, args.reset), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""列表接口序列化基准：ORM + to_dict() + jsonify 与列元组 + 快速 JSON 编码
+
+在临时 SQLite 数据库中生成会员、活动、考勤和库存记录，对每种记录取一页
+（默认 per_page=500），分别用两种方式生成响应，核对解析后的内容一致并输出平均耗时。
+
+用法: python benchmarks/serialization.py [--per-page 500] [--repeat 50]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import date, datetime, time as clock, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from app import create_app
+from app.models.member import Member, db
+from app.models.inventory import Inventory
+from app.models.attendance import Event, Attendance
+from app.utils.bulk_loader import create_loader
+from app.utils.serializers import (MEMBER_SERIALIZER, EVENT_SERIALIZER, ATTENDANCE_SERIALIZER,
+                                   INVENTORY_SERIALIZER, json_response)
+
+
+def seed(rows):
+    now = datetime(2024, 1, 1, 9, 30)
+    create_loader(Member).write([{
+        '中文姓名': f'會員{i}', '英文姓名': f'Member {i}', '性別': '女',
+        '出生日期': date(1950, 1, 1) + timedelta(days=i * 7),
+        '身份證號': f'A{i:08d}', '電話': '2345-6789', '地址': '九龍某街 1 號',
+        '地區': '九龍', '經濟狀況': '綜援', '家庭人數': i % 5, '會員編號': f'M{i:08d}',
+        '入會日期': date(2020, 1, 1), '會員狀態': '有效', '創建時間': now, '更新時間': now,
+    } for i in range(rows)])
+    create_loader(Event).write([{
+        '活動編號': f'E{i:05d}', '活動名稱': f'活動{i}', '活動日期': date(2024, 1, 1) + timedelta(days=i % 365),
+        '活動時間': clock(10, 0), '活動地點': '中心', '預計人數': 30, '創建時間': now, '更新時間': now,
+    } for i in range(rows)])
+    create_loader(Attendance).write([{
+        '會員編號': f'M{i:08d}', '活動編號': f'E{i:05d}', '是否出席': i % 3 != 0,
+        '簽到時間': now + timedelta(minutes=i), '創建時間': now, '更新時間': now,
+    } for i in range(rows)])
+    create_loader(Inventory).write([{
+        '月份': date(2024, 1 + i % 12, 1), '產品編號': f'P{i % 50:03d}', '產品描述': f'產品{i % 50}',
+        '數量': i % 10 + 1, '單位': '包', '總重量_kg': 1.5, '單價': 12.5, '總金額': 25.0,
+        '物資來源': '捐贈', '創建時間': now, '更新時間': now,
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def timed(func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='列表接口序列化基准')
+    parser.add_argument('--per-page', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(prefix='jlife-serialize-'), 'bench.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        seed(args.per_page * 2)
+
+    cases = [('members', Member, MEMBER_SERIALIZER), ('events', Event, EVENT_SERIALIZER),
+             ('attendance', Attendance, ATTENDANCE_SERIALIZER), ('inventory', Inventory, INVENTORY_SERIALIZER)]
+    with app.test_request_context():
+        for name, model, serializer in cases:
+            def orm():
+                records = model.query.order_by(model.id).limit(args.per_page).all()
+                response = jsonify({'items': [record.to_dict() for record in records]})
+                db.session.expunge_all()
+                return response.get_data()
+
+            def rows():
+                query = serializer.select(model.query).order_by(model.id).limit(args.per_page)
+                return json_response({'items': serializer.serialize(query.all())}).get_data()
+
+            orm_ms, orm_body = timed(orm, args.repeat)
+            rows_ms, rows_body = timed(rows, args.repeat)
+            if json.loads(orm_body) != json.loads(rows_body):
+                raise AssertionError(f'{name}: 两种序列化结果不一致')
+            print(json.dumps({
+                'endpoint': name,
+                'per_page': args.per_page,
+                'to_dict_ms': round(orm_ms, 2),
+                'rows_ms': round(rows_ms, 2),
+                'speedup': round(orm_ms / rows_ms, 2),
+            }, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""开发服务器与 gunicorn 的吞吐量对比
+
+用 synthetic.py 生成的数据建立临时 SQLite 数据库，分别启动 run.py 方式的开发服务器
+（debug=True）和 gunicorn.conf.py 配置的 gunicorn，以多个保持连接的客户端线程对基准接口
+持续请求，输出每秒请求数和延迟分位数（JSON）：
+
+    python benchmarks/server_throughput.py --size 10000 --clients 8 --duration 10
+    python benchmarks/server_throughput.py --workers 3 --threads 4 --servers gunicorn
+
+客户端与服务器在同一台机器上运行，会分走一部分 CPU；比较时应使用相同的参数。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from app import create_app
+from app.models.member import db
+from suite import bulk_load, request_cases
+from synthetic import generate
+
+# 对比的接口（suite.py 中的请求项目，不含导出）
+CASES = ['page_first', 'keyset_last', 'search_name', 'search_phone', 'member_stats', 'yearly_stats']
+
+# 与 run.py 相同的开发服务器，只是不启用自动重载（重载器另起子进程，不影响吞吐量）
+DEV_SERVER = """
+import sys
+from app import create_app
+create_app().run(host='127.0.0.1', port=int(sys.argv[1]), debug=True, use_reloader=False)
+"""
+
+STARTUP_TIMEOUT = 120
+
+
+def build_database(path, size, seed):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'EXCEL_SYNC_PATH': os.path.join(os.path.dirname(path), 'update.xlsx'),
+    })
+    frames = generate(size, seed=seed)
+    with app.app_context():
+        bulk_load(frames)
+        db.session.remove()
+        db.get_engine(app).dispose()
+    return frames
+
+
+def start_server(kind, port, env, args, log):
+    if kind == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER, str(port)]
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+        env = dict(env, JLIFE_BIND=f'127.0.0.1:{port}', JLIFE_WORKERS=str(args.workers),
+                   JLIFE_THREADS=str(args.threads))
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{kind} 服务器启动失败，退出码 {process.returncode}（日志：{log.name}）')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/metrics')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f'{kind} 服务器在 {STARTUP_TIMEOUT} 秒内没有就绪')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def load(port, path, clients, duration):
+    """clients 个线程各用一个保持的连接持续请求 duration 秒，返回 (总请求数, 延迟列表, 错误数)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        samples = []
+        failed = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            samples.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(samples)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), sorted(latencies), errors[0]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='开发服务器与 gunicorn 的吞吐量对比')
+    parser.add_argument('--size', type=int, default=10000, help='会员行数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--servers', default='dev,gunicorn')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count() * 2 + 1,
+                        help='默认与 gunicorn.conf.py 相同')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8, help='并发连接数')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个接口的持续秒数')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--cases', default=','.join(CASES))
+    args = parser.parse_args(argv)
+    cases = args.cases.split(',')
+
+    with tempfile.TemporaryDirectory(prefix='jlife-serve-') as directory:
+        path = os.path.join(directory, 'bench.db')
+        frames = build_database(path, args.size, args.seed)
+        urls = {case: url for case, url in request_cases(frames, args.size)}
+        env = dict(os.environ, JLIFE_DATABASE_URL=f'sqlite:///{path}', JLIFE_LOG_LEVEL='WARNING')
+
+        for kind in args.servers.split(','):
+            with open(os.path.join(directory, f'{kind}.log'), 'w') as log:
+                process = start_server(kind, args.port, env, args, log)
+                try:
+                    for case in cases:
+                        path_qs = quote(urls[case], safe='/?=&')
+                        # 预热一秒，不计入结果
+                        load(args.port, path_qs, args.clients, 1.0)
+                        count, latencies, errors = load(args.port, path_qs, args.clients, args.duration)
+                        print(json.dumps({
+                            'server': kind if kind == 'dev' else f'gunicorn {args.workers}x{args.threads}',
+                            'case': case,
+                            'size': args.size,
+                            'clients': args.clients,
+                            'requests': count,
+                            'errors': errors,
+                            'rps': round(count / args.duration, 1),
+                            'p50_ms': percentile(latencies, 0.5),
+                            'p95_ms': percentile(latencies, 0.95),
+                        }, ensure_ascii=False), flush=True)
+                finally:
+                    stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""SQLite 并发基准：导入进行期间的读吞吐
+
+分别以 default 和 production 配置档创建临时数据库，一个线程持续批量写入会员，
+多个线程同时执行按会员编号查找和计数，输出每秒读取次数和 "database is locked" 错误数。
+
+用法: python benchmarks/sqlite_concurrency.py [--duration 10] [--readers 8]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from app.models.member import Member, db
+from app.utils.bulk_loader import BulkLoader
+
+SEED_ROWS = 20000
+WRITE_BATCH = 1000
+
+
+def member_rows(start, count):
+    return [{
+        '中文姓名': f'會員{i}',
+        '身份證號': f'B{i:08d}',
+        '會員編號': f'M{i:08d}',
+        '地區': '九龍',
+        '經濟狀況': '綜援',
+    } for i in range(start, start + count)]
+
+
+def run(profile, duration, readers):
+    directory = tempfile.mkdtemp(prefix='jlife-bench-')
+    path = os.path.join(directory, 'bench.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLITE_PROFILE': profile,
+    })
+    with app.app_context():
+        loader = BulkLoader(Member, WRITE_BATCH)
+        loader.write(member_rows(0, SEED_ROWS))
+        db.session.commit()
+
+    stop = threading.Event()
+    counters = {'reads': 0, 'read_errors': 0, 'rows_written': 0, 'write_errors': 0}
+    lock = threading.Lock()
+
+    def writer():
+        # 模拟导入：不断写入一批并提交
+        next_id = SEED_ROWS
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    BulkLoader(Member, WRITE_BATCH).write(member_rows(next_id, WRITE_BATCH))
+                    db.session.commit()
+                    next_id += WRITE_BATCH
+                    with lock:
+                        counters['rows_written'] += WRITE_BATCH
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        counters['write_errors'] += 1
+            db.session.remove()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    member_id = f'M{rng.randrange(SEED_ROWS):08d}'
+                    Member.query.filter_by(會員編號=member_id).first()
+                    db.session.query(func.count(Member.id)).filter(Member.地區 == '九龍').scalar()
+                    db.session.rollback()
+                    with lock:
+                        counters['reads'] += 1
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        counters['read_errors'] += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'profile': profile,
+        'readers': readers,
+        'seconds': round(elapsed, 2),
+        'reads_per_second': round(counters['reads'] / elapsed, 1),
+        'read_errors': counters['read_errors'],
+        'rows_written_per_second': round(counters['rows_written'] / elapsed, 1),
+        'write_errors': counters['write_errors'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='导入期间的 SQLite 读吞吐基准')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--profiles', default='default,production')
+    args = parser.parse_args(argv)
+    for profile in args.profiles.split(','):
+        print(json.dumps(run(profile, args.duration, args.readers), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
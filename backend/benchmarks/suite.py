@@ -0,0 +1,511 @@
+"""热点路径基准套件：导入、搜索、统计、导出和分页
+
+对每个规模用 synthetic.py 生成确定性的数据（同一 seed 每次相同），写入临时
+SQLite 数据库后逐项计时，结果以 JSON 输出，可与之前保存的结果比较：
+
+    python benchmarks/suite.py --scales 1k,10k --output before.json
+    （修改代码后）
+    python benchmarks/suite.py --scales 1k,10k --output after.json --baseline before.json
+
+与基准相比变慢超过 --threshold（默认 25%）的项目列为回归，退出码为 1。比较的两次结果
+应在同一台空闲的机器上取得；抖动较大时加大 --repeat。
+
+导入项目把数据写成 xlsx 后经 ExcelImporter 导入（不经工作表缓存，测量首次上传的耗时）；
+工作簿按规模和 seed 缓存在 --fixtures 目录中，重复运行时不再生成。100 万行的工作簿
+生成和导入都需要数分钟，可加 --skip-import 直接批量写库，只测其他项目。
+其他项目经 Flask 测试客户端请求接口，已关闭响应缓存，测量的是实际查询和编码。
+
+每个项目计时前先核对结果（--no-verify 跳过）：导入的行数；搜索与各字段 LIKE 查询、
+分页和游标分页与 ORM 按 id 的 OFFSET 查询、会员统计与逐人 calculate_age 的结果、
+年度统计与库存明细的汇总一致；导出的行数；增量导入第二次起全部按指纹跳过；
+批量签到在 ON CONFLICT 和缺少唯一索引时的先查后写两种写法下结果相同。不一致时抛出 AssertionError。
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+from collections import Counter, defaultdict
+from datetime import date
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# 导入计时不经工作表缓存；须在导入应用之前设置
+os.environ['JLIFE_SHEET_CACHE'] = '0'
+
+import openpyxl
+import pandas as pd
+from app import create_app
+from app.models.member import Member, MemberFingerprint, db, calculate_age
+from app.models.inventory import Inventory
+from app.models.attendance import Attendance
+from app.utils.bulk_loader import create_loader
+from app.utils.check_in import UNIQUE_INDEX
+from app.utils.excel_importer import ExcelImporter, IMPORT_SPECS, prepare_frame, after_import
+from app.utils.member_upsert import MemberUpserter
+from app.utils.pagination import encode_cursor
+from app.utils.search_index import SEARCH_FIELDS
+from synthetic import generate
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+DEFAULT_THRESHOLD = 0.25
+# 差值小于此毫秒数时不算回归，避免毫秒级项目因抖动误报
+DEFAULT_MIN_DELTA_MS = 1.0
+
+# 写库顺序：考勤引用会员和活动
+KINDS = ['members', 'events', 'attendance', 'inventory']
+IMPORTERS = {
+    'members': ExcelImporter.import_members,
+    'events': ExcelImporter.import_events,
+    'attendance': ExcelImporter.import_attendance,
+    'inventory': ExcelImporter.import_inventory,
+}
+
+# 单次耗时较长的项目只运行一次
+SINGLE_RUN = {'export_xlsx', 'export_csv', 'upsert_unchanged'}
+
+PER_PAGE = 50
+SEARCH_LIMIT = 50
+# 每次批量签到的人数
+CHECK_IN_BATCH = 500
+
+
+def parse_scale(text):
+    text = text.strip().lower()
+    return SCALES[text] if text in SCALES else int(text)
+
+
+def scale_label(size):
+    for label, value in SCALES.items():
+        if value == size:
+            return label
+    return str(size)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def fixture_paths(frames, size, seed, directory):
+    """把各类数据写成 xlsx；已存在的同规模、同 seed 工作簿直接沿用"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for kind in KINDS:
+        path = os.path.join(directory, f'{kind}-{size}-{seed}.xlsx')
+        if not os.path.exists(path):
+            temp_path = f'{path}.tmp.xlsx'
+            frames[kind].to_excel(temp_path, index=False)
+            os.replace(temp_path, path)
+        paths[kind] = path
+    return paths
+
+
+def bulk_load(frames):
+    """不经工作簿，直接校验并批量写入（--skip-import）"""
+    for kind in KINDS:
+        spec = IMPORT_SPECS[kind]
+        loader = create_loader(spec['model'])
+        loader.write_frame(prepare_frame(frames[kind], spec))
+        db.session.commit()
+        after_import(spec['model'])
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+
+def orm_members(ids):
+    """ORM 路径：按 id 读取会员的 to_dict()，经 JSON 往返后与接口输出比较"""
+    members = Member.query.filter(Member.id.in_(ids)).all()
+    return {member.id: json.loads(json.dumps(member.to_dict(), ensure_ascii=False)) for member in members}
+
+
+def check_members(case, items):
+    expected = orm_members([item['id'] for item in items])
+    for item in items:
+        check(item == expected.get(item['id']), f"{case}: 会员 {item['id']} 的内容与 ORM 不一致")
+
+
+def verify_search(term):
+    """结果须为各字段 LIKE 查询（按 id 的全部匹配）的子集，条数为 min(上限, 匹配数)"""
+    def verify(case, body):
+        items = json.loads(body)
+        pattern = f'%{term}%'
+        condition = db.or_(*[getattr(Member, field).ilike(pattern) for field in SEARCH_FIELDS])
+        expected = {member_id for (member_id,) in db.session.query(Member.id).filter(condition)}
+        ids = [item['id'] for item in items]
+        check(len(ids) == min(SEARCH_LIMIT, len(expected)),
+              f'{case}: 返回 {len(ids)} 条，LIKE 查询匹配 {len(expected)} 条')
+        check(len(set(ids)) == len(ids), f'{case}: 结果有重复的会员')
+        check(set(ids) <= expected, f'{case}: 结果含 LIKE 查询不匹配的会员 {sorted(set(ids) - expected)[:5]}')
+        check_members(case, items)
+    return verify
+
+
+def verify_page(offset, total=None):
+    """与 ORM 按 id 排序的 OFFSET 查询逐条比较；total 为 None 时是游标分页的最后一页"""
+    def verify(case, body):
+        data = json.loads(body)
+        members = Member.query.order_by(Member.id).offset(offset).limit(PER_PAGE).all()
+        expected = [json.loads(json.dumps(member.to_dict(), ensure_ascii=False)) for member in members]
+        check(data['members'] == expected,
+              f"{case}: {len(data['members'])} 条记录与 ORM OFFSET {offset} 的 {len(expected)} 条不一致")
+        if total is not None:
+            check(data['total'] == total, f"{case}: total 为 {data['total']}，应为 {total}")
+        else:
+            check(data['next'] is None, f'{case}: 最后一页仍有下一页游标')
+    return verify
+
+
+def verify_member_stats(case, body):
+    """逐人按 calculate_age 计算年龄，按地區、經濟狀況分组，与统计接口比较"""
+    data = json.loads(body)
+    today = date.today()
+    ages, areas, economic = Counter(), Counter(), Counter()
+    for birth_date, area, status in db.session.query(Member.出生日期, Member.地區, Member.經濟狀況):
+        ages[calculate_age(birth_date, today)] += 1
+        areas[area or None] += 1
+        economic[status or None] += 1
+    bands = Counter()
+    for age, count in ages.items():
+        bands[None if age is None else age // 10 * 10] += count
+    check(data['total_members'] == sum(ages.values()),
+          f"{case}: total_members 为 {data['total_members']}，应为 {sum(ages.values())}")
+    check({item['age']: item['count'] for item in data['age_distribution']} == ages, f'{case}: 年龄分布不一致')
+    check({int(item['band'].split('-')[0]) if item['band'] else None: item['count']
+           for item in data['age_band_distribution']} == bands, f'{case}: 年龄段分布不一致')
+    check({item['area']: item['count'] for item in data['area_distribution']} == areas, f'{case}: 地区分布不一致')
+    check({item['status']: item['count'] for item in data['economic_distribution']} == economic,
+          f'{case}: 经济状况分布不一致')
+
+
+def verify_yearly_stats(year):
+    """按库存明细逐条汇总，与月度汇总表得出的年度统计比较（浮点和按相对误差）"""
+    def close(actual, expected):
+        return actual.keys() == expected.keys() and all(
+            math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+            for key in expected for a, b in zip(actual[key], expected[key]))
+
+    def verify(case, body):
+        data = json.loads(body)
+        monthly, products, sources = defaultdict(float), defaultdict(lambda: [0.0, 0]), defaultdict(float)
+        rows = db.session.query(Inventory.月份, Inventory.產品描述, Inventory.物資來源, Inventory.總重量_kg,
+                                Inventory.數量, Inventory.總金額).filter(
+            Inventory.月份 >= date(year, 1, 1), Inventory.月份 < date(year + 1, 1, 1))
+        for month, product, source, weight, quantity, amount in rows:
+            monthly[month.strftime('%m')] += weight or 0
+            products[product or None][0] += weight or 0
+            products[product or None][1] += quantity or 0
+            sources[source or None] += amount or 0
+        check(close({item['month']: (item['total_weight'],) for item in data['monthly_weight']},
+                    {month: (weight,) for month, weight in monthly.items()}), f'{case}: 按月重量不一致')
+        check(close({item['product']: (item['total_weight'], item['total_count']) for item in data['product_stats']},
+                    {product: tuple(values) for product, values in products.items()}), f'{case}: 按产品统计不一致')
+        check(close({item['source']: (item['total_amount'],) for item in data['source_stats']},
+                    {source: (amount,) for source, amount in sources.items()}), f'{case}: 按来源统计不一致')
+    return verify
+
+
+def export_ids():
+    return {member_id for (member_id,) in db.session.query(Member.會員編號)}
+
+
+def verify_export_csv(case, body):
+    frame = pd.read_csv(io.BytesIO(body), dtype=str, encoding='utf-8-sig', keep_default_na=False)
+    check(set(frame['會員編號']) == export_ids() and len(frame) == Member.query.count(),
+          f'{case}: 导出 {len(frame)} 行，与会员表不一致')
+
+
+def verify_export_xlsx(case, body):
+    workbook = openpyxl.load_workbook(io.BytesIO(body), read_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows)
+    position = header.index('會員編號')
+    ids = [row[position] for row in rows]
+    workbook.close()
+    check(set(ids) == export_ids() and len(ids) == Member.query.count(),
+          f'{case}: 导出 {len(ids)} 行，与会员表不一致')
+
+
+def verify_import(kind, frames):
+    model = IMPORT_SPECS[kind]['model']
+    count = model.query.count()
+    check(count == len(frames[kind]), f'{kind}: 导入后有 {count} 条，工作簿有 {len(frames[kind])} 行')
+
+
+def measure(func, repeat):
+    """预热一次后运行 repeat 次，返回各次耗时（毫秒）及最后一次的结果"""
+    result = func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+def summarize(case, size, samples, **extra):
+    return {
+        'case': case,
+        'scale': size,
+        'runs': len(samples),
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'stdev_ms': round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        **extra,
+    }
+
+
+def request_cases(frames, size):
+    """(项目名, URL, 核对函数)；搜索词和分页位置取自生成的数据，同一 seed 下固定"""
+    members = frames['members']
+    sample = members.iloc[len(members) // 2]
+    last_page = max(1, -(-size // PER_PAGE))
+    # 导入到新库的会员 id 为 1..size，游标取倒数第二页最后一条
+    last_offset = max(size - PER_PAGE, 0)
+    terms = {
+        'search_name': sample['中文姓名'],
+        'search_bigram': sample['中文姓名'][:2],
+        'search_phone': sample['電話'][-4:],
+        'search_member_id': sample['會員編號'],
+    }
+    return [
+        *[(case, f'/api/members/search?term={term}', verify_search(term)) for case, term in terms.items()],
+        ('member_stats', '/api/members/stats', verify_member_stats),
+        ('yearly_stats', '/api/inventory/stats/yearly?year=2024', verify_yearly_stats(2024)),
+        ('page_first', f'/api/members/?page=1&per_page={PER_PAGE}', verify_page(0, size)),
+        ('page_last', f'/api/members/?page={last_page}&per_page={PER_PAGE}',
+         verify_page((last_page - 1) * PER_PAGE, size)),
+        ('keyset_last', f"/api/members/?per_page={PER_PAGE}&after={encode_cursor('id', last_offset)}",
+         verify_page(last_offset)),
+        ('export_csv', '/api/members/export?format=csv', verify_export_csv),
+        ('export_xlsx', '/api/members/export', verify_export_xlsx),
+    ]
+
+
+def upsert_case(frames, size, args):
+    """会员表再做增量导入：首次为全部行建立指纹，之后每次须全部按指纹跳过"""
+    frame = prepare_frame(frames['members'], IMPORT_SPECS['members'])
+
+    def upsert():
+        upserter = MemberUpserter()
+        upserter.write_frame(frame)
+        db.session.commit()
+        return upserter.finish()
+
+    first = upsert()
+    if args.verify:
+        check(first.inserted == 0 and first.updated + first.skipped == size,
+              f'upsert: 首次增量导入 {first.to_dict()}，应全部为已有会员')
+    repeat = 1 if size > 10000 else args.repeat
+    samples, result = measure(upsert, repeat)
+    if args.verify:
+        check((result.inserted, result.updated, result.skipped) == (0, 0, size),
+              f'upsert: 未变更的数据再次导入 {result.to_dict()}，应全部跳过')
+        check(Member.query.count() == size and MemberFingerprint.query.count() == size,
+              'upsert: 增量导入后会员或指纹数量不一致')
+    return summarize('upsert_unchanged', size, samples, rows=size)
+
+
+def check_in_cases(app, client, frames, args):
+    """批量签到：分别走 ON CONFLICT 和模拟唯一索引缺失时的先查后写，核对新增/更新数和考勤记录"""
+    member_ids = list(frames['members']['會員編號'][:CHECK_IN_BATCH])
+    event_ids = frames['events']['活動編號']
+    results = []
+    for case, event_id, fallback in [('check_in', event_ids.iloc[0], False),
+                                     ('check_in_fallback', event_ids.iloc[1], True)]:
+        if args.cases and case not in args.cases:
+            continue
+        missing = app.extensions.get('missing_indexes', set())
+        if args.verify and not fallback:
+            check(UNIQUE_INDEX not in missing, f'{case}: 唯一索引 {UNIQUE_INDEX} 未能创建，无法测试 ON CONFLICT')
+        existing = db.session.query(Attendance.會員編號).filter(
+            Attendance.活動編號 == event_id, Attendance.會員編號.in_(member_ids)).count()
+        payload = {'活動編號': event_id, '會員編號': member_ids}
+        expected = [(len(member_ids) - existing, existing)]
+
+        def call():
+            response = client.post('/api/attendance/mark/batch', json=payload)
+            if response.status_code != 200:
+                raise SystemExit(f'{case}: HTTP {response.status_code} {response.get_data()[:200]!r}')
+            data = response.get_json()
+            if args.verify:
+                check((data['created'], data['updated']) == expected[0],
+                      f"{case}: 新增 {data['created']}、更新 {data['updated']}，应为 {expected[0]}")
+            # 之后的每次都是全部更新
+            expected[0] = (0, len(member_ids))
+            return data
+
+        if fallback:
+            app.extensions['missing_indexes'] = set(missing) | {UNIQUE_INDEX}
+        try:
+            samples, _ = measure(call, args.repeat)
+        finally:
+            app.extensions['missing_indexes'] = missing
+        if args.verify:
+            rows = db.session.query(Attendance.會員編號, Attendance.是否出席).filter(
+                Attendance.活動編號 == event_id, Attendance.會員編號.in_(member_ids)).all()
+            check(len(rows) == len(member_ids) and {member_id for member_id, _ in rows} == set(member_ids),
+                  f'{case}: 签到后有 {len(rows)} 条考勤记录，应为 {len(member_ids)} 条且不重复')
+            check(all(attended for _, attended in rows), f'{case}: 有签到会员未标记出席')
+        results.append(summarize(case, len(frames['members']), samples, rows=len(member_ids)))
+    return results
+
+
+def run_scale(size, args):
+    frames = generate(size, seed=args.seed)
+    # 数据库用完即删
+    with tempfile.TemporaryDirectory(prefix='jlife-bench-') as directory:
+        return run_cases(frames, size, directory, args)
+
+
+def run_cases(frames, size, directory, args):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        'EXCEL_SYNC_PATH': os.path.join(directory, 'update.xlsx'),
+        # 关闭响应缓存和慢请求日志，每次请求都实际执行
+        'RESPONSE_CACHE_BYTES': 0,
+        'SLOW_REQUEST_SECONDS': float('inf'),
+        'SLOW_QUERY_SECONDS': float('inf'),
+    })
+    results = []
+    with app.app_context():
+        if args.skip_import:
+            bulk_load(frames)
+        else:
+            paths = fixture_paths(frames, size, args.seed, args.fixtures)
+            for kind in KINDS:
+                started = time.perf_counter()
+                success, message = IMPORTERS[kind](paths[kind])
+                elapsed = (time.perf_counter() - started) * 1000
+                if not success:
+                    raise SystemExit(f'{kind} 导入失败: {message}')
+                results.append(summarize(f'import_{kind}', size, [elapsed], rows=len(frames[kind])))
+        if args.verify:
+            for kind in KINDS:
+                verify_import(kind, frames)
+
+        client = app.test_client()
+        for case, url, verify in request_cases(frames, size):
+            if args.cases and case not in args.cases:
+                continue
+
+            def call():
+                response = client.get(url)
+                # 流式响应需要读完才算完成
+                body = response.get_data()
+                if response.status_code != 200:
+                    raise SystemExit(f'{case}: HTTP {response.status_code} {body[:200]!r}')
+                return body
+
+            repeat = 1 if case in SINGLE_RUN and size > 10000 else args.repeat
+            samples, body = measure(call, repeat)
+            if args.verify:
+                verify(case, body)
+            results.append(summarize(case, size, samples, bytes=len(body)))
+
+        # 写入类项目放在最后，不影响上面各项的数据
+        if not args.cases or 'upsert_unchanged' in args.cases:
+            results.append(upsert_case(frames, size, args))
+        results.extend(check_in_cases(app, client, frames, args))
+        db.session.remove()
+        db.get_engine(app).dispose()
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """与基准结果按 (项目, 规模) 比较，返回回归列表
+
+    中位数和最小值都变慢超过 threshold、且中位数多出 min_delta_ms 以上才算回归，
+    单次的偶然抖动不会误报。
+    """
+    previous = {(item['case'], item['scale']): item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        old = previous.get((item['case'], item['scale']))
+        if old is None or not old['median_ms'] or not old['min_ms']:
+            continue
+        ratio = item['median_ms'] / old['median_ms']
+        item['baseline_ms'] = old['median_ms']
+        item['change'] = round(ratio - 1, 3)
+        if (ratio > 1 + threshold and item['min_ms'] / old['min_ms'] > 1 + threshold
+                and item['median_ms'] - old['median_ms'] >= min_delta_ms):
+            regressions.append(item)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='热点路径基准套件')
+    parser.add_argument('--scales', default='1k,10k', help='逗号分隔，可用 1k/10k/100k/1m 或行数')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cases', help='只运行这些项目，逗号分隔（导入项目总会运行）')
+    parser.add_argument('--skip-import', action='store_true', help='不经 xlsx 导入，直接批量写库')
+    parser.add_argument('--no-verify', dest='verify', action='store_false', help='只计时，不核对结果')
+    parser.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'jlife-bench-fixtures'),
+                        help='xlsx 工作簿缓存目录')
+    parser.add_argument('--output', help='把结果写入此 JSON 文件')
+    parser.add_argument('--baseline', help='与此前保存的 JSON 结果比较')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='变慢超过此比例视为回归（默认 0.25）')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='中位数差值小于此毫秒数时不算回归')
+    args = parser.parse_args(argv)
+    args.cases = set(args.cases.split(',')) if args.cases else None
+
+    results = []
+    for size in (parse_scale(scale) for scale in args.scales.split(',')):
+        for item in run_scale(size, args):
+            print(json.dumps({**item, 'scale': scale_label(size)}, ensure_ascii=False), flush=True)
+            results.append(item)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'import': 'bulk' if args.skip_import else 'xlsx',
+            'verified': args.verify,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        report['baseline'] = {'commit': baseline['meta'].get('commit'), 'threshold': args.threshold,
+                              'regressions': [(item['case'], item['scale']) for item in regressions]}
+        for item in regressions:
+            print(f"回归: {item['case']} @ {scale_label(item['scale'])}: {item['baseline_ms']:.1f} ms -> "
+                  f"{item['median_ms']:.1f} ms (+{item['change']:.0%})", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,17 @@
 import os
 import sys
+import time
+import argparse
 from app import create_app
 from app.utils.excel_importer import ExcelImporter
+from app.utils.bulk_loader import DEFAULT_BATCH_SIZE
+from app.utils.batch_import import BatchImporter, collect_files, detect_kind
 
-def import_data():
+def import_data(stream=False, upsert=False):
     app = create_app()
     with app.app_context():
         # 获取当前目录下的Excel文件
-        excel_files = [f for f in os.listdir('.') if f.endswith(('.xlsx', '.xls'))]
+        excel_files = [f for f in os.listdir('.') if f.endswith(('.xlsx', '.xls', '.ods'))]
         
         if not excel_files:
             print("当前目录下没有找到Excel文件")
@@ -33,14 +37,17 @@ def import_data():
         print(f"\n正在导入文件：{selected_file}")
         
         # 根据文件名判断导入类型
-        if 'member' in selected_file.lower():
-            success, message = ExcelImporter.import_members(selected_file)
-        elif 'inventory' in selected_file.lower():
-            success, message = ExcelImporter.import_inventory(selected_file)
-        elif 'event' in selected_file.lower():
-            success, message = ExcelImporter.import_events(selected_file)
-        elif 'attendance' in selected_file.lower():
-            success, message = ExcelImporter.import_attendance(selected_file)
+        kind = detect_kind(selected_file)
+        if kind == 'members' and upsert:
+            success, message = ExcelImporter.upsert_members(selected_file, stream=stream)
+        elif kind == 'members':
+            success, message = ExcelImporter.import_members(selected_file, stream=stream)
+        elif kind == 'inventory':
+            success, message = ExcelImporter.import_inventory(selected_file, stream=stream)
+        elif kind == 'events':
+            success, message = ExcelImporter.import_events(selected_file, stream=stream)
+        elif kind == 'attendance':
+            success, message = ExcelImporter.import_attendance(selected_file, stream=stream)
         else:
             print("无法确定文件类型，请确保文件名包含：member、inventory、event或attendance")
             return
@@ -51,5 +58,45 @@ def import_data():
         else:
             print("数据导入失败！")
 
+def import_batch(sources, processes=None, upsert=False, batch_size=DEFAULT_BATCH_SIZE):
+    """非交互批量导入目录或通配符匹配的全部文件，返回是否全部成功"""
+    files = collect_files(sources)
+    if not files:
+        print("没有找到要导入的Excel文件")
+        return False
+    
+    app = create_app()
+    with app.app_context():
+        importer = BatchImporter(processes=processes, batch_size=batch_size, upsert=upsert)
+        print(f"共 {len(files)} 个文件，使用 {importer.processes} 个进程解析")
+        started = time.perf_counter()
+        results = importer.run(files, report=lambda result: print(result.summary()))
+    
+    done = [result for result in results if result.status == 'done']
+    failed = [result for result in results if result.status == 'failed']
+    skipped = [result for result in results if result.status == 'skipped']
+    print(f"\n完成 {len(done)} 个，失败 {len(failed)} 个，跳过 {len(skipped)} 个；"
+          f"共 {sum(result.rows for result in done)} 行，总耗时 {time.perf_counter() - started:.2f} 秒")
+    return not failed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='从Excel文件导入数据')
+    parser.add_argument('sources', nargs='*',
+                        help='批量模式：要导入的目录、文件或通配符（如 "drop/*.xlsx"），不给出时交互选择')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式导入：只读逐行读取工作簿，适合超大文件（仅交互模式）')
+    parser.add_argument('--upsert', action='store_true',
+                        help='会员文件按會員編號增量导入，只写入新增或变更的行')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='批量模式下解析工作簿的进程数，默认为 CPU 核数')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='每批写入的行数')
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
-    import_data() 
\ No newline at end of file
+    args = parse_args()
+    if args.sources:
+        ok = import_batch(args.sources, processes=args.processes, upsert=args.upsert,
+                          batch_size=args.batch_size)
+        sys.exit(0 if ok else 1)
+    import_data(stream=args.stream, upsert=args.upsert)
@@ -1,24 +1,27 @@
 from app import create_app
-import logging
+from app.utils.logging_config import get_logger
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# 日志格式和级别由 create_app 中的 configure_logging 配置
+logger = get_logger(__name__)
 
-try:
-    app = create_app()
-    logger.info("应用初始化成功")
-except Exception as e:
-    logger.error(f"应用初始化失败: {str(e)}")
-    raise
 
-if __name__ == '__main__':
+def main():
+    try:
+        app = create_app()
+        logger.info("应用初始化成功")
+    except Exception as e:
+        logger.error(f"应用初始化失败: {str(e)}")
+        raise
+
     try:
         logger.info("启动服务器...")
         app.run(host='127.0.0.1', port=5000, debug=True)
     except Exception as e:
         logger.error(f"服务器启动失败: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+
+# 应用只在直接运行时创建：导入任务的解析进程（spawn）会重新导入本模块，
+# 若在模块顶层创建应用，每个解析进程都会对正在写入的数据库做一次完整初始化
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""生产环境的 WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:app
+
+创建应用后先预热常用接口，再关闭连接池中的连接；预加载模式下这一步在主进程中只做一次，
+各工作进程继承预热后的缓存，并在 post_worker_init 中各自建立连接。
+"""
+import os
+from app import create_app
+from app.utils.warmup import warm_up, release_connections
+
+app = create_app()
+
+if os.environ.get('JLIFE_WARMUP', '1') != '0':
+    warm_up(app)
+release_connections(app)
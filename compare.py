@@ -1,27 +1,69 @@
+"""会员名单比对
+
+以會員編號比对本地名单（local.ods）和更新名单（update.ods），并以更新名单为准生成名单（swap.ods）。
+swap.ods 已存在时沿用其表头的列及顺序，否则沿用本地名单的列；指定 --report 时另写出差异报告。
+
+用法:
+    python compare.py
+    python compare.py local.ods update.ods --report diff.xlsx --roster swap.ods
+"""
+import os
+import sys
+import argparse
 import pandas as pd
 
-da = pd.read_excel("local.ods")
-db = pd.read_excel("update.ods")
-dc = pd.read_excel("swap.ods")
-filec = dc.columns
-db = db.rename(columns = {'中文姓名' : '姓名'})
-db = db.rename(columns = {'居住類型' : '住屋類別'})
-common_lines = da.columns.intersection(db.columns)
-diff_lines = list(set(da.columns) - set(db.columns))
-dc = da[diff_lines].head(517)
-da = da[common_lines].head(517)
-db = db[common_lines]
-db['住屋類別'] = db['住屋類別'].str.rstrip(',')
-temd = da.drop(columns = ['姓名', '家庭編號', '婚姻狀況', '年齡', '性別', '地址', '分流', '住屋類別'])
-match_db = temd.merge(db, on="會員編號")
-diff = da != match_db
-db = db.sort_values(by = "會員編號")
-
-wdata = db.reindex(columns = filec)
-for col in wdata.columns:
-    if col in dc.columns:
-        wdata[col] = dc[col]
-wdata.to_excel("swap.ods", index = False)
-print(da)
-print(match_db)
-print(diff)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from app.utils.reconcile import Roster, reconcile, merge_roster
+from app.utils.sheet_cache import read_excel_cached
+
+# 更新名单的列名与本地名单不同
+RENAMES = {'中文姓名': '姓名', '居住類型': '住屋類別'}
+
+
+def read_update(path):
+    frame = read_excel_cached(path).rename(columns=RENAMES)
+    if '住屋類別' in frame.columns:
+        frame['住屋類別'] = frame['住屋類別'].str.rstrip(',')
+    return frame
+
+
+def roster_columns(path, default):
+    """生成名单的列：已有的名单文件只读表头作为模板，不存在时用 default"""
+    if os.path.exists(path):
+        return list(pd.read_excel(path, nrows=0).columns)
+    return default
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='以會員編號比对两份会员名单')
+    parser.add_argument('local', nargs='?', default='local.ods', help='本地名单')
+    parser.add_argument('update', nargs='?', default='update.ods', help='更新名单')
+    parser.add_argument('--report', help='差异报告（.xlsx/.ods 或 .csv），不指定则不写出')
+    parser.add_argument('--roster', default='swap.ods', help='生成的名单，留空则不生成')
+    parser.add_argument('--columns', help='只比对这些字段，以逗号分隔')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    local_frame = read_excel_cached(args.local)
+    local_columns = list(local_frame.columns)
+    local = Roster(local_frame)
+    update = Roster(read_update(args.update))
+    columns = args.columns.split(',') if args.columns else None
+
+    result = reconcile(local, update, columns)
+    print(result.summary())
+    if args.report:
+        result.write_report(args.report)
+        print(f"差异报告已写入 {args.report}")
+
+    if args.roster:
+        columns = roster_columns(args.roster, local_columns)
+        merge_roster(local, update, columns).to_excel(args.roster, index=False)
+        print(f"名单已写入 {args.roster}")
+
+
+if __name__ == '__main__':
+    main()